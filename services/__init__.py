@@ -3,5 +3,6 @@
 """
 
 from .hash_service import HashService
+from .dir_listing import scan_directory, list_directory
 
-__all__ = ['HashService']
+__all__ = ['HashService', 'scan_directory', 'list_directory']
@@ -0,0 +1,34 @@
+"""
+取消令牌模块 - 在工作线程与长时间运行的服务函数之间传递取消请求
+"""
+
+import threading
+
+
+class OperationCancelled(Exception):
+    """操作已被取消"""
+
+
+class CancellationToken:
+    """取消令牌
+
+    由发起方（通常是界面线程）调用 cancel()，服务函数在处理文件之间、
+    读取数据块之间调用 raise_if_cancelled() 或检查 cancelled。
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """请求取消"""
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        """是否已请求取消"""
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        """已请求取消时抛出 OperationCancelled"""
+        if self._event.is_set():
+            raise OperationCancelled()
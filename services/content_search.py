@@ -0,0 +1,192 @@
+"""
+内容搜索服务模块 - 并行扫描文件内容，按行报告匹配（类似 grep）
+"""
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .dir_walker import walk_parallel, DEFAULT_WALK_WORKERS
+
+CONTENT_CHUNK_SIZE = 1024 * 1024
+BINARY_SNIFF_SIZE = 8192  # 开头这部分含 NUL 字节即视为二进制文件
+MAX_LINE_CHARS = 300  # 结果中每行最多保留的字符数
+MAX_CARRY_SIZE = 16 * 1024 * 1024  # 超长的行不再等待换行符，直接按块处理
+
+
+def compile_content_pattern(query, use_regex=False, case_sensitive=False):
+    """把查询文本编译为字节正则表达式
+
+    普通文本同时匹配 UTF-8 与 GBK 编码（两者不同时），
+    正则表达式按 UTF-8 编码匹配。不区分大小写只对 ASCII 字母有效。
+
+    Raises:
+        re.error: 正则表达式无效
+    """
+    flags = re.MULTILINE if case_sensitive else re.MULTILINE | re.IGNORECASE  # ^ $ 按行匹配
+    if use_regex:
+        return re.compile(query.encode('utf-8'), flags)
+    variants = [query.encode('utf-8')]
+    try:
+        gbk = query.encode('gbk')
+        if gbk != variants[0]:
+            variants.append(gbk)
+    except UnicodeEncodeError:
+        pass
+    return re.compile(b'|'.join(map(re.escape, variants)), flags)
+
+
+def _decode_line(raw):
+    raw = raw.rstrip(b'\r')
+    for encoding in ('utf-8', 'gbk'):
+        try:
+            text = raw.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        text = raw.decode('utf-8', errors='replace')
+    if len(text) > MAX_LINE_CHARS:
+        text = text[:MAX_LINE_CHARS] + '...'
+    return text
+
+
+def _search_block(regex, block, line_no, hits, max_hits):
+    """在以完整行结尾的数据块中查找匹配行（每行只报告一次）
+
+    Returns:
+        int: 块之后的下一行行号
+    """
+    pos = 0
+    counted = 0
+    while pos < len(block) and (max_hits is None or len(hits) < max_hits):
+        match = regex.search(block, pos)
+        if match is None:
+            break
+        start = block.rfind(b'\n', 0, match.start()) + 1
+        end = block.find(b'\n', match.start())
+        if end < 0:
+            end = len(block)
+        line_no += block.count(b'\n', counted, start)
+        counted = start
+        hits.append((line_no, _decode_line(block[start:end])))
+        pos = end + 1
+    return line_no + block.count(b'\n', counted)
+
+
+def search_file(file_path, regex, max_hits=None, cancel_token=None):
+    """在单个文件中查找匹配的行
+
+    以大块无缓冲读取，数据块在最后一个换行处切分，余下部分并入下一块。
+    开头 BINARY_SNIFF_SIZE 字节含 NUL 的文件视为二进制，不搜索。
+    只按内容判断，不看扩展名（FileComparer._is_text_file 先查扩展名
+    白名单，只检查开头 512 字节）。
+    调用方应只传入普通文件：打开命名管道、设备文件会一直阻塞。
+
+    Returns:
+        list: [(行号, 行内容), ...]，二进制或无法读取的文件返回空列表
+
+    Raises:
+        OperationCancelled: 已被取消
+    """
+    hits = []
+    try:
+        with open(file_path, 'rb', buffering=0) as f:
+            line_no = 1
+            carry = b''
+            first = True
+            while max_hits is None or len(hits) < max_hits:
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                data = f.read(CONTENT_CHUNK_SIZE)
+                if first:
+                    if b'\0' in data[:BINARY_SNIFF_SIZE]:
+                        return []
+                    first = False
+                if not data:
+                    if carry:
+                        _search_block(regex, carry, line_no, hits, max_hits)
+                    break
+                block = carry + data if carry else data
+                cut = block.rfind(b'\n') + 1
+                if cut == 0 and len(block) < MAX_CARRY_SIZE:
+                    carry = block
+                    continue
+                if cut == 0:
+                    cut = len(block)
+                carry = block[cut:]
+                line_no = _search_block(regex, block[:cut], line_no, hits, max_hits)
+    except OSError:
+        return []
+    return hits
+
+
+def _is_regular_file(entry):
+    try:
+        return entry.is_file()
+    except OSError:
+        return False
+
+
+def search_content(root, regex, name_matcher=None, max_workers=None, max_hits=None,
+                   exclude=None, cancel_token=None):
+    """并行搜索目录下文件的内容
+
+    目录由 walk_parallel 并行遍历，名称先经 name_matcher 筛选（不做 stat），
+    通过的文件交给线程池读取和匹配；同时在途的文件数有上限。
+    只搜索普通文件（跟随符号链接判断），跳过命名管道、套接字和设备文件。
+    读文件时释放 GIL，扫描由正则引擎在整块数据上完成。
+
+    Args:
+        root: 根目录
+        regex: compile_content_pattern 得到的字节正则表达式
+        name_matcher: PatternMatcher，只搜索名称匹配的文件，None 表示全部
+        max_workers: 线程数
+        max_hits: 每个文件最多报告的行数，None 表示不限
+        exclude: 要排除的名称通配符列表
+        cancel_token: CancellationToken
+
+    Yields:
+        tuple: (file_path, [(行号, 行内容), ...])，只产出有匹配的文件，按完成顺序
+
+    Raises:
+        OperationCancelled: 已被取消
+    """
+    max_workers = max_workers or DEFAULT_WALK_WORKERS
+    max_pending = max_workers * 4
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+
+        def drain(block):
+            """等待至少一个任务完成（block 为 False 时只取已完成的）"""
+            done, _ = wait(pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+            for future in done:
+                file_path = pending.pop(future)
+                hits = future.result()
+                if hits:
+                    yield file_path, hits
+
+        try:
+            for dirpath, dirs, files in walk_parallel(root, max_workers, exclude=exclude,
+                                                      cancel_token=cancel_token):
+                names = [entry.name for entry in files if _is_regular_file(entry)]
+                if name_matcher is not None:
+                    names = name_matcher.filter(names)
+                for name in names:
+                    while len(pending) >= max_pending:
+                        yield from drain(True)
+                        if cancel_token is not None:
+                            cancel_token.raise_if_cancelled()
+                    file_path = os.path.join(dirpath, name)
+                    future = executor.submit(search_file, file_path, regex, max_hits, cancel_token)
+                    pending[future] = file_path
+                if pending:
+                    yield from drain(False)
+            while pending:
+                yield from drain(True)
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,44 @@
+"""
+目录列表服务模块 - 基于 os.scandir 的目录枚举
+"""
+
+import os
+
+
+def scan_directory(path):
+    """逐项枚举目录内容
+
+    类型取自 DirEntry（多数平台无需额外系统调用），大小和修改时间
+    来自每个条目唯一的一次 stat（Windows 上由 scandir 直接提供）。
+
+    Args:
+        path: 目录路径
+
+    Yields:
+        tuple: (name, is_dir, size, mtime)，size/mtime 为原始数值，
+               目录的 size 为 0
+    """
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                is_dir = entry.is_dir()
+                try:
+                    st = entry.stat()
+                except OSError:
+                    # 失效的符号链接：退回链接本身的信息
+                    st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            yield (entry.name, is_dir, 0 if is_dir else st.st_size, st.st_mtime)
+
+
+def list_directory(path):
+    """列出目录内容
+
+    Returns:
+        list: [(name, is_dir, size, mtime), ...]
+
+    Raises:
+        OSError: 目录不存在或无权限时由 os.scandir 抛出
+    """
+    return list(scan_directory(path))
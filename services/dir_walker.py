@@ -0,0 +1,133 @@
+"""
+目录遍历服务模块 - 基于 os.scandir 与线程池的并行目录遍历
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .pattern_matcher import get_matcher
+
+# 遍历以等待 I/O 为主（网络存储上尤其如此），线程数可以多于 CPU 核数
+DEFAULT_WALK_WORKERS = min(32, (os.cpu_count() or 4) * 4)
+
+
+def _scan(path, excludes, stat_files, stat_dirs):
+    """在工作线程中读取一个目录
+
+    Returns:
+        tuple: (dirs, files)，均为 os.DirEntry 列表；目录无法读取时返回 None
+    """
+    dirs = []
+    files = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if excludes and any(matcher.match(entry.name) for matcher in excludes):
+                    continue
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    dirs.append(entry)
+                    prefetch = stat_dirs
+                else:
+                    files.append(entry)
+                    prefetch = stat_files
+                if prefetch:
+                    # DirEntry 会缓存 stat 结果，调用方再取时不再产生 I/O
+                    try:
+                        entry.stat()
+                    except OSError:
+                        pass
+    except OSError:
+        return None
+    return dirs, files
+
+
+def walk_parallel(root, max_workers=None, max_depth=None, exclude=None,
+                  follow_symlinks=False, stat_files=False, cancel_token=None):
+    """并行遍历目录树
+
+    目录的读取分派到线程池，多个目录的 I/O 延迟相互重叠。同时在途的
+    目录数有上限，调用方处理得慢时不会继续预读，内存占用有界。
+    与 os.walk 相同：父目录总是先于其子目录产出，调用方可以就地修改
+    dirs 列表来跳过子目录；指向目录的符号链接列在 dirs 中，
+    但默认不进入。各目录按读取完成的顺序产出，不保证固定顺序。
+
+    Args:
+        root: 根目录
+        max_workers: 线程数，默认 DEFAULT_WALK_WORKERS
+        max_depth: 最大深度（根目录为 0），None 表示不限
+        exclude: 要排除的名称通配符列表（如 ['.git', '*.tmp']，不区分大小写），
+                 匹配的目录不进入，匹配的文件不列出
+        follow_symlinks: 是否进入指向目录的符号链接；进入时按
+                         (st_dev, st_ino) 记录已访问的目录，避免循环
+        stat_files: 是否在工作线程中预先取得文件的 stat 信息
+        cancel_token: CancellationToken
+
+    Yields:
+        tuple: (dirpath, dirs, files)，dirs/files 为 os.DirEntry 列表
+
+    Raises:
+        OperationCancelled: 已被取消
+    """
+    max_workers = max_workers or DEFAULT_WALK_WORKERS
+    max_pending = max_workers * 4
+    excludes = [get_matcher(pattern) for pattern in exclude or ()]
+
+    visited = set()
+    if follow_symlinks:
+        try:
+            st = os.stat(root)
+            visited.add((st.st_dev, st.st_ino))
+        except OSError:
+            return
+
+    stack = [(root, 0)]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+        try:
+            while True:
+                while stack and len(pending) < max_pending:
+                    if cancel_token is not None:
+                        cancel_token.raise_if_cancelled()
+                    path, depth = stack.pop()
+                    future = executor.submit(_scan, path, excludes, stat_files, follow_symlinks)
+                    pending[future] = (path, depth)
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                for future in done:
+                    path, depth = pending.pop(future)
+                    result = future.result()
+                    if result is None:
+                        continue
+                    dirs, files = result
+                    yield path, dirs, files
+
+                    if max_depth is not None and depth >= max_depth:
+                        continue
+                    for entry in dirs:
+                        if follow_symlinks:
+                            try:
+                                st = entry.stat()
+                            except OSError:
+                                continue
+                            key = (st.st_dev, st.st_ino)
+                            if key in visited:
+                                continue
+                            visited.add(key)
+                        else:
+                            try:
+                                if entry.is_symlink():
+                                    continue
+                            except OSError:
+                                continue
+                        stack.append((entry.path, depth + 1))
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,618 @@
+"""
+文件名索引服务模块 - 类似 locate 的持久化文件名索引
+"""
+
+import atexit
+import functools
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from itertools import accumulate
+from pathlib import Path
+
+
+# 条目类型
+KIND_FILE = 0
+KIND_DIR = 1
+KIND_DIR_LINK = 2  # 指向目录的符号链接：作为目录列出，但不进入
+
+# 依赖匹配位置上下文的写法：在拼接文本上扫描可能漏掉候选，需逐个名称匹配
+_CONTEXT_SENSITIVE = re.compile(r'\\[AZ]|\(\?<?[=!]')
+
+# 忽略大小写时会与 ASCII 字母匹配的非 ASCII 字符，建三元组前先折叠
+_FOLD = str.maketrans({'\u0130': 'i', '\u0131': 'i', '\u017f': 's', '\u212a': 'k'})
+_SIMPLE_ESCAPES = frozenset('dDwWsSbBAZ')
+_REPEAT = re.compile(r'\{\d*,?\d*\}')
+
+
+def required_literals(source):
+    """提取正则表达式的任何匹配都必然包含的字面片段
+
+    只识别顶层的普通字符序列：分组内容、字符类和带 ?、*、{m,n} 的字符
+    都视为断开。遇到无法可靠分析的写法（顶层 |、(? 扩展语法、\\x 等转义）
+    时返回空列表。结果只含可打印的 ASCII 字符并已转为小写。
+
+    Returns:
+        list: 字面片段
+    """
+    if '(?' in source:
+        return []
+    runs = []
+    current = []
+    depth = 0
+    i = 0
+    while i < len(source):
+        c = source[i]
+        i += 1
+        if c == '\\':
+            if i >= len(source):
+                return []
+            escaped = source[i]
+            i += 1
+            if escaped.isalnum():
+                if escaped not in _SIMPLE_ESCAPES:
+                    return []
+            elif depth == 0 and escaped.isascii() and escaped.isprintable():
+                current.append(escaped.lower())
+                continue
+        elif c in '*?' or (c == '{' and _REPEAT.match(source, i - 1)):
+            # 量词作用于上一个字符，该字符可能不出现
+            if c == '{':
+                i = _REPEAT.match(source, i - 1).end()
+            if current:
+                current.pop()
+        elif c == '[':
+            if source[i:i + 1] == '^':
+                i += 1
+            if source[i:i + 1] == ']':
+                i += 1
+            while i < len(source) and source[i] != ']':
+                i += 2 if source[i] == '\\' else 1
+            i += 1
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == '|':
+            if depth == 0:
+                return []
+        elif c not in '.^$+' and depth == 0 and c.isascii() and c.isprintable():
+            current.append(c.lower())
+            continue
+        # 其余情况都断开当前片段
+        if current:
+            runs.append(''.join(current))
+            current = []
+    if current:
+        runs.append(''.join(current))
+    return runs
+
+
+@functools.lru_cache(maxsize=64)
+def _compile_scanner(source):
+    """编译用于扫描拼接文本的正则表达式，依赖上下文的模式返回 None"""
+    if _CONTEXT_SENSITIVE.search(source):
+        return None
+    return re.compile(source, re.IGNORECASE | re.MULTILINE)
+
+
+def _trigrams(literals):
+    """字面片段中的三元组集合"""
+    return {run[i:i + 3] for run in literals for i in range(len(run) - 2)}
+
+
+def _scan_directory(path):
+    """读取一个目录，返回编码后的条目 (names, kinds, sizes, mtimes)
+
+    Raises:
+        OSError: 目录不存在或无权限
+    """
+    names = []
+    kinds = bytearray()
+    sizes = array('q')
+    mtimes = array('d')
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    kind = KIND_DIR
+                elif entry.is_dir():
+                    kind = KIND_DIR_LINK
+                else:
+                    kind = KIND_FILE
+                try:
+                    st = entry.stat()
+                except OSError:
+                    st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            names.append(os.fsencode(entry.name))
+            kinds.append(kind)
+            sizes.append(st.st_size if kind == KIND_FILE else 0)
+            mtimes.append(st.st_mtime)
+    return b'\0'.join(names), bytes(kinds), sizes.tobytes(), mtimes.tobytes()
+
+
+def _decode_names(names, kinds):
+    return os.fsdecode(names).split('\0') if kinds else []
+
+
+def _dir_key(path):
+    """排序键：分隔符换成最小的字符，使每棵子树在排序后连续"""
+    return path.replace(os.sep, '\0')
+
+
+class _TrigramIndex:
+    """名称三元组的倒排索引
+
+    以 BLOCK_LINES 行为一块，记录每个三元组（折叠大小写后）出现在哪些块中。
+    按块而不是按行记录，建立时只需对每块文本取一次三元组集合；
+    查询得到的候选块再交给正则引擎在块内扫描。
+    """
+
+    BLOCK_LINES = 256
+
+    def __init__(self, blob, starts):
+        line_count = len(starts) - 1
+        postings = defaultdict(list)
+        for block, lo in enumerate(range(0, line_count, self.BLOCK_LINES)):
+            hi = min(lo + self.BLOCK_LINES, line_count)
+            text = blob[starts[lo]:starts[hi]].translate(_FOLD).lower()
+            for trigram in set(zip(text, text[1:], text[2:])):
+                postings[trigram].append(block)
+        self.line_count = line_count
+        self.postings = {''.join(key): array('I', blocks) for key, blocks in postings.items()}
+
+    def line_ranges(self, trigrams, lo, hi):
+        """返回 [lo, hi) 内包含全部三元组的块所覆盖的行范围列表"""
+        lists = []
+        for trigram in trigrams:
+            blocks = self.postings.get(trigram)
+            if blocks is None:
+                return []
+            lists.append(blocks)
+        lists.sort(key=len)
+        candidates = set(lists[0])
+        for blocks in lists[1:]:
+            candidates.intersection_update(blocks)
+            if not candidates:
+                return []
+
+        ranges = []
+        for block in sorted(candidates):
+            start = max(block * self.BLOCK_LINES, lo)
+            end = min((block + 1) * self.BLOCK_LINES, hi)
+            if start >= end:
+                continue
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+        return ranges
+
+
+class _Snapshot:
+    """某个根目录索引的只读内存快照
+
+    所有名称以换行拼接成 blob，第 i 个名称位于 blob[starts[i]:starts[i + 1] - 1]；
+    目录按 _dir_key 排序，第 d 个目录的条目为 dir_starts[d] 到 dir_starts[d + 1] 行。
+    """
+
+    def __init__(self, records):
+        dir_paths = sorted(records, key=_dir_key)
+        names = []
+        kinds = bytearray()
+        sizes = array('q')
+        mtimes = array('d')
+        dir_starts = array('q', [0])
+        odd_names = {}  # 行号 -> 含换行符的原名称
+        for dir_path in dir_paths:
+            _, dir_names, dir_kinds, dir_sizes, dir_mtimes = records[dir_path]
+            decoded = _decode_names(dir_names, dir_kinds)
+            for i, name in enumerate(decoded):
+                if '\n' in name:
+                    odd_names[len(names) + i] = name
+                    decoded[i] = name.replace('\n', '\0')
+            names.extend(decoded)
+            kinds.extend(dir_kinds)
+            sizes.frombytes(dir_sizes)
+            mtimes.frombytes(dir_mtimes)
+            dir_starts.append(len(names))
+
+        self.dir_paths = dir_paths
+        self.dir_keys = [_dir_key(path) for path in dir_paths]
+        self.dir_starts = dir_starts
+        self.blob = '\n'.join(names)
+        self.starts = array('q', accumulate((len(name) + 1 for name in names), initial=0))
+        self.kinds = kinds
+        self.sizes = sizes
+        self.mtimes = mtimes
+        self.odd_names = odd_names
+        self.trigrams = None  # _TrigramIndex，由 build_trigrams() 在后台建立
+
+    def build_trigrams(self):
+        self.trigrams = _TrigramIndex(self.blob, self.starts)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def name(self, line):
+        odd = self.odd_names.get(line)
+        if odd is not None:
+            return odd
+        return self.blob[self.starts[line]:self.starts[line + 1] - 1]
+
+    def line_range(self, path):
+        """返回 path 子树内条目的行号范围 [lo, hi)"""
+        base = _dir_key(path).rstrip('\0')
+        lo = bisect_left(self.dir_keys, base)
+        hi = bisect_left(self.dir_keys, base + '\x01')
+        return self.dir_starts[lo], self.dir_starts[hi]
+
+    def entry(self, line):
+        """返回 (path, is_dir, size, mtime)"""
+        dir_index = bisect_right(self.dir_starts, line) - 1
+        path = os.path.join(self.dir_paths[dir_index], self.name(line))
+        return (path, self.kinds[line] != KIND_FILE, self.sizes[line], self.mtimes[line])
+
+
+class FileIndex:
+    """持久化文件名索引
+
+    按根目录建立索引，每个目录在数据库中占一行：目录的 mtime 加上紧凑
+    编码的条目（名称以 NUL 分隔，类型、大小、修改时间为定长数组）。
+
+    - update() 首次对根目录完整遍历；之后只重新读取 mtime 变化的目录，
+      未变化的目录沿用索引中的条目及其子目录
+    - 搜索在内存快照上进行：所有名称以换行拼接成一段文本，由正则引擎
+      扫描文本找出候选行，再对候选名称做精确匹配
+    - 快照建立后在后台生成三元组倒排索引；模式中含有长度不小于 3 的
+      字面片段时，只扫描同时含有这些片段全部三元组的块
+    - 目录 mtime 只反映直接条目的增删和改名，文件内容变化引起的大小、
+      修改时间变化要等所在目录下次被重新读取时才会更新
+    """
+
+    REFRESH_INTERVAL = 300  # 秒，索引超过这个时间后在后台增量刷新
+    PROGRESS_INTERVAL = 200  # 每读取多少个目录报告一次进度
+
+    def __init__(self, db_path=None):
+        if db_path is None:
+            db_path = Path.home() / '.filemanager' / 'file_index.db'
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.db_path = db_path
+        self._lock = threading.Lock()  # 保护数据库连接与内存状态
+        self._update_lock = threading.Lock()  # 同一时间只运行一次 update
+        self._snapshots = {}  # root -> _Snapshot
+        self._refreshing = set()
+
+        self._conn = sqlite3.connect(str(db_path), timeout=10, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS roots ('
+            ' path BLOB PRIMARY KEY,'
+            ' updated REAL NOT NULL)'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS dirs ('
+            ' root BLOB NOT NULL,'
+            ' path BLOB NOT NULL,'
+            ' mtime_ns INTEGER NOT NULL,'
+            ' names BLOB NOT NULL,'
+            ' kinds BLOB NOT NULL,'
+            ' sizes BLOB NOT NULL,'
+            ' mtimes BLOB NOT NULL,'
+            ' PRIMARY KEY (root, path))'
+        )
+        self._conn.commit()
+        self._roots = {
+            os.fsdecode(path): updated
+            for path, updated in self._conn.execute('SELECT path, updated FROM roots')
+        }
+
+    # ---- 根目录管理 ----
+
+    def roots(self):
+        """返回已索引的根目录及其最后更新时间 {root: updated}"""
+        with self._lock:
+            return dict(self._roots)
+
+    def covering_root(self, path):
+        """返回包含 path 的已索引根目录（最深的一个），没有则返回 None"""
+        path = os.path.abspath(path)
+        with self._lock:
+            roots = list(self._roots)
+        best = None
+        for root in roots:
+            if path == root or path.startswith(root.rstrip(os.sep) + os.sep):
+                if best is None or len(root) > len(best):
+                    best = root
+        return best
+
+    def is_indexed(self, path):
+        """path 是否位于某个已索引的根目录下"""
+        return self.covering_root(path) is not None
+
+    def age(self, path):
+        """path 所在根目录的索引距上次更新的秒数，未被索引时返回 None"""
+        root = self.covering_root(path)
+        if root is None:
+            return None
+        with self._lock:
+            return time.time() - self._roots.get(root, 0)
+
+    def ensure(self, path, cancel_token=None, progress_callback=None, build=True):
+        """保证 path 可以从索引中搜索
+
+        未被索引时：build 为 True 则同步建立索引，为 False 则在后台建立，
+        本次返回 False。所在根目录的索引已过期时在后台增量刷新，
+        本次搜索先使用现有索引。
+
+        Returns:
+            bool: 现在能否从索引中搜索 path
+        """
+        root = self.covering_root(path)
+        if root is None:
+            if not build:
+                self.update_in_background(path)
+                return False
+            self.update(path, cancel_token, progress_callback)
+            return True
+        with self._lock:
+            updated = self._roots.get(root, 0)
+        if time.time() - updated > self.REFRESH_INTERVAL:
+            self.update_in_background(root)
+        return True
+
+    def remove_root(self, root):
+        """删除某个根目录的索引"""
+        root = os.path.abspath(root)
+        key = os.fsencode(root)
+        with self._lock:
+            self._conn.execute('DELETE FROM dirs WHERE root = ?', (key,))
+            self._conn.execute('DELETE FROM roots WHERE path = ?', (key,))
+            self._conn.commit()
+            self._roots.pop(root, None)
+            self._snapshots.pop(root, None)
+
+    # ---- 建立与刷新 ----
+
+    def update(self, root, cancel_token=None, progress_callback=None):
+        """建立或增量刷新根目录的索引
+
+        从根目录向下遍历，只重新读取 mtime 与索引不同的目录，
+        不再存在的目录从索引中删除。不跟随指向目录的符号链接。
+
+        Args:
+            root: 根目录
+            cancel_token: CancellationToken，取消时不写入任何改动
+            progress_callback: 进度回调 (已处理目录数, 当前目录)
+
+        Returns:
+            dict: {'dirs': 目录总数, 'rescanned': 重新读取的目录数, 'removed': 删除的目录数}
+
+        Raises:
+            OSError: 根目录不存在或无法读取
+            OperationCancelled: 已取消
+        """
+        root = os.path.abspath(root)
+        root_key = os.fsencode(root)
+        with self._update_lock:
+            os.stat(root)
+            old = self._load_records(root_key)
+            records = {}
+            changed = []
+            stack = [root]
+            while stack:
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                path = stack.pop()
+                try:
+                    mtime_ns = os.stat(path).st_mtime_ns
+                    record = old.get(path)
+                    if record is None or record[0] != mtime_ns:
+                        record = (mtime_ns,) + _scan_directory(path)
+                        changed.append((path, record))
+                except OSError:
+                    if path == root:
+                        raise
+                    continue
+                records[path] = record
+                names, kinds = record[1], record[2]
+                if KIND_DIR in kinds:
+                    for name, kind in zip(_decode_names(names, kinds), kinds):
+                        if kind == KIND_DIR:
+                            stack.append(os.path.join(path, name))
+                if progress_callback and len(records) % self.PROGRESS_INTERVAL == 0:
+                    progress_callback(len(records), path)
+
+            removed = [path for path in old if path not in records]
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            self._save(root_key, changed, removed)
+            self._install_snapshot(root, _Snapshot(records))
+
+        return {'dirs': len(records), 'rescanned': len(changed), 'removed': len(removed)}
+
+    def update_in_background(self, root):
+        """在后台线程中增量刷新根目录的索引（同一根目录不会重复启动）"""
+        root = os.path.abspath(root)
+        with self._lock:
+            if root in self._refreshing:
+                return
+            self._refreshing.add(root)
+
+        def run():
+            try:
+                self.update(root)
+            except (OSError, sqlite3.Error):
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(root)
+
+        threading.Thread(target=run, name='file-index-refresh', daemon=True).start()
+
+    def _load_records(self, root_key):
+        """读取根目录下所有目录的记录 {path: (mtime_ns, names, kinds, sizes, mtimes)}"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT path, mtime_ns, names, kinds, sizes, mtimes FROM dirs WHERE root = ?',
+                (root_key,)
+            ).fetchall()
+        return {os.fsdecode(row[0]): row[1:] for row in rows}
+
+    def _save(self, root_key, changed, removed):
+        updated = time.time()
+        with self._lock:
+            try:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO dirs'
+                    ' (root, path, mtime_ns, names, kinds, sizes, mtimes)'
+                    ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    [(root_key, os.fsencode(path)) + record for path, record in changed]
+                )
+                self._conn.executemany(
+                    'DELETE FROM dirs WHERE root = ? AND path = ?',
+                    [(root_key, os.fsencode(path)) for path in removed]
+                )
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO roots (path, updated) VALUES (?, ?)',
+                    (root_key, updated)
+                )
+                self._conn.commit()
+            except sqlite3.Error:
+                self._conn.rollback()
+                raise
+            self._roots[os.fsdecode(root_key)] = updated
+
+    def _snapshot(self, root):
+        with self._lock:
+            snapshot = self._snapshots.get(root)
+        if snapshot is None:
+            snapshot = self._install_snapshot(
+                root, _Snapshot(self._load_records(os.fsencode(root))), replace=False
+            )
+        return snapshot
+
+    def _install_snapshot(self, root, snapshot, replace=True):
+        """登记快照并在后台为它建立三元组索引，返回登记后的快照"""
+        with self._lock:
+            if not replace and root in self._snapshots:
+                return self._snapshots[root]
+            self._snapshots[root] = snapshot
+        threading.Thread(
+            target=snapshot.build_trigrams, name='file-index-trigrams', daemon=True
+        ).start()
+        return snapshot
+
+    # ---- 搜索 ----
+
+    def search(self, matcher, path, include_dirs=True):
+        """在索引中按名称搜索
+
+        Args:
+            matcher: PatternMatcher，其扩展名集合只作用于文件
+            path: 搜索范围，须位于已索引的根目录下
+            include_dirs: 是否包含文件夹
+
+        Returns:
+            生成器，依次产生 (path, is_dir, size, mtime)
+
+        Raises:
+            ValueError: path 不在任何已索引的根目录下
+        """
+        path = os.path.abspath(path)
+        root = self.covering_root(path)
+        if root is None:
+            raise ValueError(f"未建立索引: {path}")
+
+        if matcher.kind == 'all':
+            scanner, trigrams = None, ()
+        else:
+            scanner = _compile_scanner(matcher.regex_source)
+            trigrams = _trigrams(required_literals(matcher.regex_source))
+        return self._iter_matches(self._snapshot(root), path, scanner, matcher,
+                                  include_dirs, trigrams)
+
+    @staticmethod
+    def _iter_matches(snapshot, path, scanner, matcher, include_dirs, trigrams=()):
+        lo, hi = snapshot.line_range(path)
+        index = snapshot.trigrams
+        if trigrams and index is not None:
+            ranges = index.line_ranges(trigrams, lo, hi)
+        else:
+            ranges = [(lo, hi)]
+        for lo, hi in ranges:
+            if scanner is None:
+                candidates = range(lo, hi)
+            else:
+                candidates = FileIndex._scan_candidates(snapshot, scanner, lo, hi)
+            yield from FileIndex._check_candidates(snapshot, candidates, matcher, include_dirs)
+
+    @staticmethod
+    def _check_candidates(snapshot, candidates, matcher, include_dirs):
+        kinds = snapshot.kinds
+        for line in candidates:
+            is_dir = kinds[line] != KIND_FILE
+            if is_dir and not include_dirs:
+                continue
+            name = snapshot.name(line)
+            if not is_dir and not matcher.matches_extension(name):
+                continue
+            if matcher.match(name):
+                yield snapshot.entry(line)
+
+    @staticmethod
+    def _scan_candidates(snapshot, scanner, lo, hi):
+        """在拼接文本上扫描，产生含有匹配起点的行号
+
+        每找到一个候选行就从下一行行首继续扫描，跨行的匹配只会多产生
+        候选（随后被精确匹配排除），不会遮住后面行中的匹配。
+        """
+        if hi <= lo:
+            return
+        blob = snapshot.blob
+        starts = snapshot.starts
+        pos = starts[lo]
+        end = starts[hi] - 1
+        while pos <= end:
+            match = scanner.search(blob, pos, end)
+            if match is None:
+                return
+            line = bisect_right(starts, match.start(), lo, hi) - 1
+            yield line
+            pos = starts[line + 1]
+
+    def close(self):
+        """关闭数据库"""
+        with self._lock:
+            self._conn.close()
+
+
+_shared_index = None
+_shared_index_lock = threading.Lock()
+
+
+def get_file_index():
+    """获取进程内共享的文件名索引
+
+    Returns:
+        FileIndex 或 None（数据库无法打开时不使用索引）
+    """
+    global _shared_index
+    with _shared_index_lock:
+        if _shared_index is None:
+            try:
+                _shared_index = FileIndex()
+                atexit.register(_shared_index.close)
+            except (OSError, sqlite3.Error):
+                _shared_index = False
+        return _shared_index or None
@@ -0,0 +1,192 @@
+"""
+文件系统监视服务模块 - 基于 Linux inotify 的目录变化通知
+"""
+
+import os
+import sys
+import select
+import struct
+import threading
+import ctypes
+import ctypes.util
+
+
+# inotify 事件掩码（见 <sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+class DirectoryWatcher:
+    """目录监视器
+
+    每个目录只占用一个 inotify watch，可被多个订阅者共享。
+    回调在监视线程中执行，签名为 callback(dir_path, name)：
+    name 为发生变化的条目名；为 None 表示整个目录需要重新读取
+    （目录本身被删除/移动，或事件队列溢出）。
+    """
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 失败: {os.strerror(err)}")
+
+        self._lock = threading.Lock()
+        self._wd_to_path = {}
+        self._path_to_wd = {}
+        self._subscribers = {}  # path -> [callback, ...]
+
+        self._wake_r, self._wake_w = os.pipe()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="DirectoryWatcher", daemon=True)
+        self._thread.start()
+
+    def watch(self, path, callback):
+        """订阅目录变化
+
+        Returns:
+            bool: 是否监视成功（如超出系统 watch 数量上限则为 False）
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            if path not in self._path_to_wd:
+                wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+                if wd < 0:
+                    return False
+                self._wd_to_path[wd] = path
+                self._path_to_wd[path] = wd
+            callbacks = self._subscribers.setdefault(path, [])
+            if callback not in callbacks:
+                callbacks.append(callback)
+        return True
+
+    def unwatch(self, path, callback):
+        """取消订阅，目录没有订阅者时释放 watch"""
+        path = os.path.abspath(path)
+        with self._lock:
+            callbacks = self._subscribers.get(path)
+            if not callbacks or callback not in callbacks:
+                return
+            callbacks.remove(callback)
+            if not callbacks:
+                del self._subscribers[path]
+                wd = self._path_to_wd.pop(path, None)
+                if wd is not None:
+                    self._wd_to_path.pop(wd, None)
+                    self._libc.inotify_rm_watch(self._fd, wd)
+
+    def is_watching(self, path):
+        """目录当前是否处于监视中"""
+        with self._lock:
+            return os.path.abspath(path) in self._path_to_wd
+
+    def close(self):
+        """停止监视线程并释放资源"""
+        self._running = False
+        os.write(self._wake_w, b'x')
+        self._thread.join(timeout=1)
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _run(self):
+        while self._running:
+            try:
+                readable, _, _ = select.select([self._fd, self._wake_r], [], [])
+            except (OSError, ValueError):
+                return
+            if self._wake_r in readable or not self._running:
+                return
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            except OSError:
+                return
+            self._dispatch(data)
+
+    def _dispatch(self, data):
+        notifications = []
+        offset = 0
+        with self._lock:
+            while offset + _EVENT_HEADER.size <= len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                raw_name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    # 事件丢失：所有目录都需要重新读取
+                    for path, callbacks in self._subscribers.items():
+                        notifications.append((list(callbacks), path, None))
+                    continue
+
+                path = self._wd_to_path.get(wd)
+                if path is None:
+                    continue
+                callbacks = list(self._subscribers.get(path, ()))
+
+                if mask & IN_IGNORED:
+                    # 内核已移除该 watch（目录被删除或卸载）
+                    self._wd_to_path.pop(wd, None)
+                    if self._path_to_wd.get(path) == wd:
+                        del self._path_to_wd[path]
+                    notifications.append((callbacks, path, None))
+                elif mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    notifications.append((callbacks, path, None))
+                else:
+                    notifications.append((callbacks, path, os.fsdecode(raw_name) if raw_name else None))
+
+        for callbacks, path, name in notifications:
+            for callback in callbacks:
+                try:
+                    callback(path, name)
+                except Exception:
+                    continue
+
+
+_shared_watcher = None
+_shared_watcher_lock = threading.Lock()
+
+
+def get_directory_watcher():
+    """获取进程内共享的目录监视器
+
+    Returns:
+        DirectoryWatcher 或 None（非 Linux 平台或 inotify 不可用）
+    """
+    global _shared_watcher
+    if not sys.platform.startswith('linux'):
+        return None
+    with _shared_watcher_lock:
+        if _shared_watcher is None:
+            try:
+                _shared_watcher = DirectoryWatcher()
+            except (OSError, AttributeError):
+                _shared_watcher = False
+        return _shared_watcher or None
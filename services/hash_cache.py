@@ -0,0 +1,189 @@
+"""
+哈希缓存服务模块 - 持久化保存文件哈希值，避免重复读取未变化的文件
+"""
+
+import atexit
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+class HashCache:
+    """基于 SQLite 的文件哈希缓存
+
+    以 (st_dev, st_ino, algorithm) 定位记录，命中时还要求 size 与
+    mtime_ns 一致，文件被修改后旧记录自然失效并在下次写入时被覆盖。
+
+    - 写入先进入内存缓冲，攒够 FLUSH_BATCH 条或调用 flush() 时一次提交
+    - 记录数超过 max_entries 时按最近使用时间淘汰最旧的部分
+    """
+
+    FLUSH_BATCH = 256
+    EVICT_RATIO = 0.9  # 淘汰后保留的比例
+
+    def __init__(self, db_path=None, max_entries=500000):
+        if db_path is None:
+            db_path = Path.home() / '.filemanager' / 'hash_cache.db'
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._pending = {}  # (dev, ino, algorithm) -> (size, mtime_ns, digest, last_used)
+        self._touched = {}  # (dev, ino, algorithm) -> last_used
+
+        self._conn = sqlite3.connect(str(db_path), timeout=10, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS hashes ('
+            ' dev INTEGER NOT NULL,'
+            ' ino INTEGER NOT NULL,'
+            ' algorithm TEXT NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' mtime_ns INTEGER NOT NULL,'
+            ' digest TEXT NOT NULL,'
+            ' last_used REAL NOT NULL,'
+            ' PRIMARY KEY (dev, ino, algorithm))'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_hashes_last_used ON hashes (last_used)')
+        self._conn.commit()
+
+    def get(self, st, algorithm):
+        """查询缓存的哈希值
+
+        Args:
+            st: 文件的 os.stat_result
+            algorithm: 算法名（可带取样等后缀以区分不同的计算方式）
+
+        Returns:
+            str 或 None
+        """
+        key = (st.st_dev, st.st_ino, algorithm)
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None:
+                row = pending[:3]
+            else:
+                row = self._conn.execute(
+                    'SELECT size, mtime_ns, digest FROM hashes'
+                    ' WHERE dev = ? AND ino = ? AND algorithm = ?', key
+                ).fetchone()
+            if row is None or row[0] != st.st_size or row[1] != st.st_mtime_ns:
+                return None
+            if pending is None:
+                self._touched[key] = time.time()
+                if len(self._touched) >= self.FLUSH_BATCH:
+                    self._flush_locked()
+            return row[2]
+
+    def get_all(self, st):
+        """查询文件所有仍然有效的缓存记录（不更新使用时间）
+
+        Args:
+            st: 文件的 os.stat_result
+
+        Returns:
+            dict: {algorithm: digest}
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT algorithm, size, mtime_ns, digest FROM hashes WHERE dev = ? AND ino = ?',
+                (st.st_dev, st.st_ino)
+            ).fetchall()
+            for (dev, ino, algorithm), value in self._pending.items():
+                if dev == st.st_dev and ino == st.st_ino:
+                    rows.append((algorithm,) + value[:3])
+        return {
+            algorithm: digest for algorithm, size, mtime_ns, digest in rows
+            if size == st.st_size and mtime_ns == st.st_mtime_ns
+        }
+
+    def put(self, st, algorithm, digest):
+        """写入哈希值（st 应为计算前取得的 stat 结果）"""
+        key = (st.st_dev, st.st_ino, algorithm)
+        with self._lock:
+            self._pending[key] = (st.st_size, st.st_mtime_ns, digest, time.time())
+            self._touched.pop(key, None)
+            if len(self._pending) >= self.FLUSH_BATCH:
+                self._flush_locked()
+
+    def flush(self):
+        """提交缓冲中的写入"""
+        with self._lock:
+            self._flush_locked()
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._pending.clear()
+            self._touched.clear()
+            self._conn.execute('DELETE FROM hashes')
+            self._conn.commit()
+
+    def close(self):
+        """提交写入并关闭数据库"""
+        with self._lock:
+            try:
+                self._flush_locked()
+            finally:
+                self._conn.close()
+
+    def _flush_locked(self):
+        if not self._pending and not self._touched:
+            return
+        try:
+            if self._pending:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO hashes'
+                    ' (dev, ino, algorithm, size, mtime_ns, digest, last_used)'
+                    ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    [key + value for key, value in self._pending.items()]
+                )
+            if self._touched:
+                self._conn.executemany(
+                    'UPDATE hashes SET last_used = ? WHERE dev = ? AND ino = ? AND algorithm = ?',
+                    [(last_used,) + key for key, last_used in self._touched.items()]
+                )
+            if self._pending:
+                self._evict_locked()
+            self._conn.commit()
+        except sqlite3.Error:
+            self._conn.rollback()
+        finally:
+            self._pending.clear()
+            self._touched.clear()
+
+    def _evict_locked(self):
+        """记录数超过上限时删除最久未使用的记录"""
+        count = self._conn.execute('SELECT COUNT(*) FROM hashes').fetchone()[0]
+        if count <= self.max_entries:
+            return
+        excess = count - int(self.max_entries * self.EVICT_RATIO)
+        self._conn.execute(
+            'DELETE FROM hashes WHERE rowid IN'
+            ' (SELECT rowid FROM hashes ORDER BY last_used LIMIT ?)', (excess,)
+        )
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_hash_cache():
+    """获取进程内共享的哈希缓存
+
+    Returns:
+        HashCache 或 None（数据库无法打开时不使用缓存）
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            try:
+                _shared_cache = HashCache()
+                atexit.register(_shared_cache.close)
+            except (OSError, sqlite3.Error):
+                _shared_cache = False
+        return _shared_cache or None
@@ -2,10 +2,284 @@
 哈希计算服务模块
 """
 
+import functools
 import hashlib
+import multiprocessing
 import os
+import stat
+import zlib
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
 
+from .cancellation import OperationCancelled
+from .dir_walker import walk_parallel
+from .hash_cache import get_hash_cache
+
+
+# 批量哈希的默认并发数和读取缓冲区大小
+DEFAULT_HASH_WORKERS = os.cpu_count() or 4
+DEFAULT_BATCH_CHUNK_SIZE = 1024 * 1024
+
+# 查重预筛时对文件首尾各取样的字节数
+DUPLICATE_SAMPLE_SIZE = 64 * 1024
+
+# 查重快速指纹对文件首、中、尾各取样的字节数
+FINGERPRINT_SAMPLE_SIZE = 4096
+
+# 支持的哈希算法
+# BLAKE2 可写作 "blake2b-<位数>" / "blake2s-<位数>" 指定摘要长度（8 的倍数）
+HASH_ALGORITHMS = {
+    'md5': hashlib.md5,
+    'sha1': hashlib.sha1,
+    'sha256': hashlib.sha256,
+    'blake2b': hashlib.blake2b,
+    'blake2s': hashlib.blake2s
+}
+
+BLAKE2_MAX_DIGEST_BITS = {
+    'blake2b': hashlib.blake2b.MAX_DIGEST_SIZE * 8,
+    'blake2s': hashlib.blake2s.MAX_DIGEST_SIZE * 8
+}
+
+
+def _hash_factory(algorithm):
+    """解析算法名
+
+    Returns:
+        tuple: (规范化的算法名, 哈希对象构造函数)
+
+    Raises:
+        ValueError: 不支持的算法或摘要长度
+    """
+    name = algorithm.lower()
+    factory = HASH_ALGORITHMS.get(name)
+    if factory is not None:
+        return name, factory
+    
+    family, sep, bits = name.partition('-')
+    if sep and family in BLAKE2_MAX_DIGEST_BITS and bits.isdigit():
+        bits = int(bits)
+        if bits == BLAKE2_MAX_DIGEST_BITS[family]:
+            # 完整长度与不带位数的写法是同一种摘要，共用一个缓存键
+            return family, HASH_ALGORITHMS[family]
+        if bits % 8 == 0 and 8 <= bits < BLAKE2_MAX_DIGEST_BITS[family]:
+            return f"{family}-{bits}", functools.partial(HASH_ALGORITHMS[family], digest_size=bits // 8)
+    raise ValueError(f"不支持的算法: {algorithm}")
+
+
+def _hash_file(file_path, algorithm, chunk_size, cancel_token=None):
+    """计算单个文件的哈希值（模块级函数，可在进程池中执行）"""
+    try:
+        return HashService.calculate_hash(file_path, algorithm, chunk_size, cancel_token=cancel_token)
+    finally:
+        _flush_worker_cache()
+
+
+def _partial_hash_file(file_path, algorithm, sample_size):
+    """计算单个文件首尾取样的哈希值（模块级函数，可在进程池中执行）"""
+    try:
+        return HashService.calculate_partial_hash(file_path, algorithm, sample_size)
+    finally:
+        _flush_worker_cache()
+
+
+def _fingerprint_file(file_path, sample_size):
+    """计算单个文件的快速指纹（模块级函数，可在进程池中执行）"""
+    try:
+        return HashService.calculate_fingerprint(file_path, sample_size)
+    finally:
+        _flush_worker_cache()
+
+
+def _flush_worker_cache():
+    """进程池的工作进程退出时不执行 atexit，需要每次计算后立即提交缓存"""
+    if multiprocessing.parent_process() is not None:
+        cache = get_hash_cache()
+        if cache is not None:
+            cache.flush()
+
+
+def _cached_digest(file_path, cache_key, compute, use_cache):
+    """先查哈希缓存，未命中时调用 compute() 计算并写回
+
+    只缓存普通文件；计算前后 size 或 mtime 发生变化时不写入。
+    """
+    cache = get_hash_cache() if use_cache else None
+    if cache is None:
+        return compute()
+    
+    st = os.stat(file_path)
+    if not stat.S_ISREG(st.st_mode):
+        return compute()
+    digest = cache.get(st, cache_key)
+    if digest is not None:
+        return digest
+    
+    digest = compute()
+    after = os.stat(file_path)
+    if (after.st_size, after.st_mtime_ns, after.st_ino) == (st.st_size, st.st_mtime_ns, st.st_ino):
+        cache.put(st, cache_key, digest)
+    return digest
+
+
+def _hash_stream(file_path, hash_objs, chunk_size=None, cancel_token=None):
+    """读取整个文件并送入所有哈希对象
+
+    用一个预先分配的 bytearray 循环 readinto，避免每块都分配新的 bytes 对象。
+    不使用 mmap：映射的文件被其他进程截断（如日志轮转）时，访问越界
+    页面会使整个进程因 SIGBUS 退出，而 readinto 只会读到较短的数据。
+
+    Args:
+        file_path: 文件路径
+        hash_objs: 哈希对象序列
+        chunk_size: 每块字节数，None 表示 DEFAULT_BATCH_CHUNK_SIZE
+        cancel_token: CancellationToken，每读取一块检查一次
+
+    Raises:
+        OperationCancelled: 读取过程中被取消
+    """
+    chunk_size = chunk_size or DEFAULT_BATCH_CHUNK_SIZE
+    with open(file_path, 'rb', buffering=0) as f:
+        buffer = bytearray(chunk_size)
+        with memoryview(buffer) as view:
+            while True:
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                if n == chunk_size:
+                    for hash_obj in hash_objs:
+                        hash_obj.update(view)
+                else:
+                    with view[:n] as block:
+                        for hash_obj in hash_objs:
+                            hash_obj.update(block)
+
+
+def _iter_parallel(func, file_paths, args, max_workers, use_processes, cancel_token=None):
+    """在线程池/进程池中对每个文件执行 func(file_path, *args)，按完成顺序产出
+
+    同时在途的任务数有上限，文件列表很大时也不会一次性创建所有任务。
+    每提交、完成一个任务都检查 cancel_token；取消或提前结束时
+    尚未开始的任务直接撤销。
+
+    Yields:
+        tuple: (file_path, result)，执行失败时 result 为 None
+
+    Raises:
+        OperationCancelled: 已被取消
+    """
+    max_workers = max_workers or DEFAULT_HASH_WORKERS
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    max_pending = max_workers * 4
+    paths = iter(file_paths)
+
+    with executor_class(max_workers=max_workers) as executor:
+        pending = {}
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < max_pending:
+                    if cancel_token is not None:
+                        cancel_token.raise_if_cancelled()
+                    file_path = next(paths, None)
+                    if file_path is None:
+                        exhausted = True
+                        break
+                    future = executor.submit(func, file_path, *args)
+                    pending[future] = file_path
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                for future in done:
+                    file_path = pending.pop(future)
+                    try:
+                        yield file_path, future.result()
+                    except Exception:
+                        yield file_path, None
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _inode_unchanged(file_path, inode, follow_symlinks):
+    """核对路径当前指向的 inode 与扫描时一致"""
+    try:
+        st = os.stat(file_path, follow_symlinks=follow_symlinks)
+    except OSError:
+        return False
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns) == \
+        (inode['dev'], inode['ino'], inode['size'], inode['mtime_ns'])
+
+
+def _replace_with_link(target, file_path):
+    """用指向 target 的硬链接原子替换 file_path"""
+    directory, name = os.path.split(file_path)
+    temp_path = os.path.join(directory, f".{name}.{os.getpid()}.hardlink-tmp")
+    os.link(target, temp_path)
+    try:
+        os.replace(temp_path, file_path)
+    except OSError:
+        os.unlink(temp_path)
+        raise
+
+
+def _keep_priority(inode):
+    """保留 inode 的优先级（有范围外硬链接的优先，其次硬链接多的）"""
+    return (inode['nlink'] > inode['links_seen'], inode['links_seen'])
+
+
+class DuplicateGroup:
+    """一组内容相同的文件
+    
+    inodes 中每一项对应一个 inode（同一 inode 的硬链接已合并）：
+    {'dev', 'ino', 'size', 'nlink', 'mtime_ns', 'paths', 'links_seen'}，
+    其中 links_seen 为扫描范围内看到的硬链接数（不含符号链接）。
+    """
+    
+    def __init__(self, hash_value, size, inodes):
+        self.hash_value = hash_value
+        self.size = size
+        self.inodes = inodes
+    
+    @property
+    def paths(self):
+        """组内所有路径"""
+        return [path for inode in self.inodes for path in inode['paths']]
+    
+    @property
+    def file_count(self):
+        return sum(len(inode['paths']) for inode in self.inodes)
+    
+    def kept_inodes(self):
+        """每个设备上保留的 inode
+        
+        优先保留有扫描范围外硬链接的 inode（它本来就无法释放），
+        其次保留硬链接最多的。
+        """
+        kept = {}
+        for inode in self.inodes:
+            current = kept.get(inode['dev'])
+            if current is None or _keep_priority(inode) > _keep_priority(current):
+                kept[inode['dev']] = inode
+        return list(kept.values())
+    
+    @property
+    def reclaimable(self):
+        """把重复文件替换为硬链接（或删除）后实际能释放的字节数
+        
+        每个设备保留一份；有扫描范围外硬链接的 inode 不计入。
+        """
+        kept = {id(inode) for inode in self.kept_inodes()}
+        return sum(
+            inode['size'] for inode in self.inodes
+            if id(inode) not in kept and inode['nlink'] <= inode['links_seen']
+        )
+
 
 class HashService:
     """哈希计算服务"""
@@ -15,9 +289,7 @@ class HashService:
         """计算文件的MD5哈希值"""
         md5_hash = hashlib.md5()
         try:
-            with open(file_path, 'rb') as f:
-                while chunk := f.read(chunk_size):
-                    md5_hash.update(chunk)
+            _hash_stream(file_path, (md5_hash,), chunk_size)
             return md5_hash.hexdigest()
         except Exception as e:
             raise Exception(f"计算MD5失败: {str(e)}")
@@ -27,9 +299,7 @@ class HashService:
         """计算文件的SHA1哈希值"""
         sha1_hash = hashlib.sha1()
         try:
-            with open(file_path, 'rb') as f:
-                while chunk := f.read(chunk_size):
-                    sha1_hash.update(chunk)
+            _hash_stream(file_path, (sha1_hash,), chunk_size)
             return sha1_hash.hexdigest()
         except Exception as e:
             raise Exception(f"计算SHA1失败: {str(e)}")
@@ -39,34 +309,236 @@ class HashService:
         """计算文件的SHA256哈希值"""
         sha256_hash = hashlib.sha256()
         try:
-            with open(file_path, 'rb') as f:
-                while chunk := f.read(chunk_size):
-                    sha256_hash.update(chunk)
+            _hash_stream(file_path, (sha256_hash,), chunk_size)
             return sha256_hash.hexdigest()
         except Exception as e:
             raise Exception(f"计算SHA256失败: {str(e)}")
     
     @staticmethod
-    def calculate_hash(file_path, algorithm='md5', chunk_size=8192):
-        """计算文件哈希值（通用方法）"""
-        algorithms = {
-            'md5': hashlib.md5,
-            'sha1': hashlib.sha1,
-            'sha256': hashlib.sha256
-        }
+    def calculate_hash(file_path, algorithm='md5', chunk_size=None, use_cache=True,
+                       cancel_token=None):
+        """计算文件哈希值（通用方法）
         
-        if algorithm.lower() not in algorithms:
-            raise ValueError(f"不支持的算法: {algorithm}")
+        默认先查持久化哈希缓存，文件未变化（设备、inode、大小、
+        修改时间均相同）时不读取文件内容。chunk_size 为 None 时
+        使用 DEFAULT_BATCH_CHUNK_SIZE。给出 cancel_token 时
+        每读取一块检查一次，取消后抛出 OperationCancelled。
+        """
+        name, factory = _hash_factory(algorithm)
+        
+        def compute():
+            hash_obj = factory()
+            _hash_stream(file_path, (hash_obj,), chunk_size, cancel_token)
+            return hash_obj.hexdigest()
         
-        hash_obj = algorithms[algorithm.lower()]()
         try:
+            return _cached_digest(file_path, name, compute, use_cache)
+        except OperationCancelled:
+            raise
+        except Exception as e:
+            raise Exception(f"计算{algorithm.upper()}失败: {str(e)}")
+    
+    @staticmethod
+    def get_cached_hashes(file_path):
+        """只查询持久化哈希缓存，返回文件所有有效的缓存值（不读取文件内容）
+        
+        完整摘要的算法名规范化（如 blake2b-512 记为 blake2b）；
+        取样哈希、指纹等带 ":" 的键原样返回。
+        
+        Returns:
+            dict: {algorithm: digest}，缓存不可用或不是普通文件时为空
+        """
+        cache = get_hash_cache()
+        if cache is None:
+            return {}
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return {}
+        if not stat.S_ISREG(st.st_mode):
+            return {}
+        digests = {}
+        for key, digest in cache.get_all(st).items():
+            if ':' not in key:
+                try:
+                    key, _ = _hash_factory(key)
+                except ValueError:
+                    continue
+            digests[key] = digest
+        return digests
+    
+    @staticmethod
+    def calculate_digests(file_path, algorithms=('md5', 'sha1', 'sha256'),
+                          chunk_size=None, use_cache=True):
+        """一次读取文件，同时计算多种哈希值
+        
+        每个数据块依次送入所有哈希对象，I/O 开销与计算单一哈希相同。
+        已在哈希缓存中的算法不再计算；全部命中时不读取文件。
+        
+        Args:
+            file_path: 文件路径
+            algorithms: 算法名序列 (md5, sha1, sha256, blake2b, blake2s 等)
+            chunk_size: 每次读取的字节数，None 表示 DEFAULT_BATCH_CHUNK_SIZE
+            use_cache: 是否使用哈希缓存
+        
+        Returns:
+            dict: {algorithm: hash_value, ...}
+        """
+        factories = {}
+        for algorithm in algorithms:
+            name, factory = _hash_factory(algorithm)
+            factories.setdefault(name, factory)
+        names = list(factories)
+        
+        try:
+            cache = get_hash_cache() if use_cache else None
+            st = None
+            digests = {}
+            if cache is not None:
+                st = os.stat(file_path)
+                if stat.S_ISREG(st.st_mode):
+                    for name in names:
+                        digest = cache.get(st, name)
+                        if digest is not None:
+                            digests[name] = digest
+                else:
+                    cache = None
+            
+            missing = [name for name in names if name not in digests]
+            if missing:
+                hash_objs = [factories[name]() for name in missing]
+                _hash_stream(file_path, hash_objs, chunk_size)
+                for name, hash_obj in zip(missing, hash_objs):
+                    digests[name] = hash_obj.hexdigest()
+                
+                if cache is not None:
+                    after = os.stat(file_path)
+                    if (after.st_size, after.st_mtime_ns, after.st_ino) == (st.st_size, st.st_mtime_ns, st.st_ino):
+                        for name in missing:
+                            cache.put(st, name, digests[name])
+            
+            return {name: digests[name] for name in names}
+        except Exception as e:
+            raise Exception(f"计算哈希失败: {str(e)}")
+    
+    @staticmethod
+    def calculate_partial_hash(file_path, algorithm='md5', sample_size=DUPLICATE_SAMPLE_SIZE,
+                               use_cache=True):
+        """计算文件首尾取样的哈希值
+        
+        只读取开头和结尾各 sample_size 字节。文件不超过 2 * sample_size 时
+        读取的就是全部内容，结果与 calculate_hash 相同。
+        取样结果同样写入哈希缓存（与完整哈希分开存放）。
+        """
+        name, factory = _hash_factory(algorithm)
+        
+        def compute():
+            hash_obj = factory()
             with open(file_path, 'rb') as f:
-                while chunk := f.read(chunk_size):
-                    hash_obj.update(chunk)
+                size = os.fstat(f.fileno()).st_size
+                if size <= sample_size * 2:
+                    hash_obj.update(f.read())
+                else:
+                    hash_obj.update(f.read(sample_size))
+                    f.seek(-sample_size, os.SEEK_END)
+                    hash_obj.update(f.read(sample_size))
             return hash_obj.hexdigest()
+        
+        cache_key = f"{name}:sample{sample_size}"
+        try:
+            return _cached_digest(file_path, cache_key, compute, use_cache)
         except Exception as e:
             raise Exception(f"计算{algorithm.upper()}失败: {str(e)}")
     
+    @staticmethod
+    def calculate_fingerprint(file_path, sample_size=FINGERPRINT_SAMPLE_SIZE, use_cache=True):
+        """计算文件的快速 64 位指纹（非加密，仅用于查重预筛）
+        
+        读取开头、中间、结尾各 sample_size 字节，高 32 位为 CRC32，
+        低 32 位为 Adler-32。文件不超过 3 * sample_size 时读取全部内容。
+        指纹不同则内容一定不同；指纹相同仍需完整哈希确认。
+        
+        Returns:
+            str: 16 位十六进制字符串
+        """
+        def compute():
+            with open(file_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size <= sample_size * 3:
+                    data = f.read()
+                else:
+                    head = f.read(sample_size)
+                    f.seek((size - sample_size) // 2)
+                    middle = f.read(sample_size)
+                    f.seek(-sample_size, os.SEEK_END)
+                    data = head + middle + f.read(sample_size)
+            return f"{zlib.crc32(data):08x}{zlib.adler32(data):08x}"
+        
+        try:
+            return _cached_digest(file_path, f"fp64:sample{sample_size}", compute, use_cache)
+        except Exception as e:
+            raise Exception(f"计算文件指纹失败: {str(e)}")
+    
+    @staticmethod
+    def iter_hashes(file_paths, algorithm='md5', max_workers=None,
+                    chunk_size=None, use_processes=False, cancel_token=None):
+        """并行计算多个文件的哈希值，按完成顺序逐个产出
+        
+        hashlib 在处理大块数据时会释放 GIL，线程池即可利用多核；
+        use_processes=True 时改用进程池。同时在途的任务数有上限，
+        文件列表很大时也不会一次性创建所有任务。
+        
+        Args:
+            file_paths: 文件路径序列
+            algorithm: 哈希算法 (md5, sha1, sha256, blake2b, blake2s, blake2b-<位数> 等)
+            max_workers: 并发数，默认为 CPU 核数
+            chunk_size: 每次读取的字节数，None 表示 DEFAULT_BATCH_CHUNK_SIZE
+            use_processes: 是否使用进程池
+            cancel_token: CancellationToken；使用进程池时只在文件之间检查
+        
+        Yields:
+            tuple: (file_path, hash_value)，计算失败时 hash_value 为 None
+        
+        Raises:
+            OperationCancelled: 已被取消
+        """
+        worker_token = None if use_processes else cancel_token
+        return _iter_parallel(_hash_file, file_paths, (algorithm, chunk_size, worker_token),
+                              max_workers, use_processes, cancel_token)
+    
+    @staticmethod
+    def calculate_hashes(file_paths, algorithm='md5', progress_callback=None,
+                         max_workers=None, chunk_size=None,
+                         use_processes=False, cancel_token=None):
+        """批量计算文件哈希值
+        
+        Args:
+            file_paths: 文件路径列表
+            algorithm: 哈希算法 (md5, sha1, sha256, blake2b, blake2s, blake2b-<位数> 等)
+            progress_callback: 进度回调函数 (current, total)
+            max_workers: 并发数，默认为 CPU 核数
+            chunk_size: 每次读取的字节数，None 表示 DEFAULT_BATCH_CHUNK_SIZE
+            use_processes: 是否使用进程池
+            cancel_token: CancellationToken
+        
+        Returns:
+            dict: {file_path: hash_value, ...}（计算失败的文件不包含在内）
+        
+        Raises:
+            OperationCancelled: 已被取消
+        """
+        file_paths = list(file_paths)
+        total = len(file_paths)
+        results = {}
+        for idx, (file_path, file_hash) in enumerate(
+                HashService.iter_hashes(file_paths, algorithm, max_workers, chunk_size,
+                                        use_processes, cancel_token)):
+            if file_hash is not None:
+                results[file_path] = file_hash
+            if progress_callback:
+                progress_callback(idx + 1, total)
+        return results
+    
     @staticmethod
     def verify_hash(file_path, expected_hash, algorithm='md5'):
         """验证文件哈希值"""
@@ -74,43 +546,240 @@ class HashService:
         return calculated_hash.lower() == expected_hash.lower()
     
     @staticmethod
-    def find_duplicates(directory, algorithm='md5', progress_callback=None):
-        """查找重复文件
+    def _collect_files(directory, cancel_token=None):
+        """递归收集目录下所有文件及其 stat 信息
+        
+        使用 walk_parallel 并行读取目录，stat 在遍历线程中预先取得；
+        与 os.walk 相同，不进入指向目录的符号链接。指向文件的符号链接
+        按目标文件记录。
+        
+        Returns:
+            list: [(file_path, size, st_dev, st_ino, st_nlink, st_mtime_ns, is_symlink), ...]
+        """
+        files = []
+        for _, _, entries in walk_parallel(directory, stat_files=True, cancel_token=cancel_token):
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        st = entry.stat()
+                        files.append((entry.path, st.st_size, st.st_dev, st.st_ino,
+                                      st.st_nlink, st.st_mtime_ns, entry.is_symlink()))
+                except OSError:
+                    continue
+        files.sort()  # 并行遍历的产出顺序不固定，排序后结果可重现
+        return files
+    
+    @staticmethod
+    def find_duplicates(directory, algorithm='md5', progress_callback=None, max_workers=None,
+                        prefilter='sample', cancel_token=None):
+        """查找重复文件（一次性返回全部结果，见 iter_duplicate_groups）
+        
+        Returns:
+            dict: {hash_value: [file_paths], ...}
+        
+        Raises:
+            OperationCancelled: 已被取消
+        """
+        return dict(HashService.iter_duplicates(
+            directory, algorithm, progress_callback, max_workers, prefilter, cancel_token
+        ))
+    
+    @staticmethod
+    def iter_duplicates(directory, algorithm='md5', progress_callback=None, max_workers=None,
+                        prefilter='sample', cancel_token=None):
+        """查找重复文件，每确认一组即产出 (hash_value, [file_paths])
+        
+        参数与 iter_duplicate_groups 相同。
+        """
+        for group in HashService.iter_duplicate_groups(
+                directory, algorithm, progress_callback, max_workers, prefilter, cancel_token):
+            yield group.hash_value, group.paths
+    
+    @staticmethod
+    def iter_duplicate_groups(directory, algorithm='md5', progress_callback=None, max_workers=None,
+                              prefilter='sample', cancel_token=None):
+        """查找重复文件，每确认一组即产出 DuplicateGroup
+        
+        分阶段筛选，尽量少读数据：
+        1. 按 (st_dev, st_ino) 合并硬链接，每个 inode 只处理一次；
+           再按文件大小分组，大小唯一的 inode 不可能重复，直接排除
+        2. 大小相同的 inode 先做预筛，再次分组：
+           - prefilter='sample'：用 algorithm 计算首尾各 64 KB 的哈希，
+             不超过 128 KB 的文件已读取全部内容，不再重复计算
+           - prefilter='fingerprint'：计算快速 64 位指纹（首中尾各 4 KB）
+        3. 预筛结果仍然相同的 inode 才计算完整哈希
+        
+        同一 inode 的多个硬链接不算重复；只有内容相同的不同 inode
+        才构成重复组。某个大小分组（或预筛分组）全部处理完后立即
+        产出其中已确认的重复组，不必等待整个扫描结束。
+        进度回调按阶段分别报告（第 2、3 步各自从 0 开始）。
         
         Args:
             directory: 要搜索的目录
-            algorithm: 哈希算法 (md5, sha1, sha256)
+            algorithm: 哈希算法 (md5, sha1, sha256, blake2b, blake2s, blake2b-<位数> 等)
             progress_callback: 进度回调函数 (current, total)
+            max_workers: 并行哈希的并发数，默认为 CPU 核数
+            prefilter: 预筛方式 ('sample' 或 'fingerprint')
+            cancel_token: CancellationToken，在目录、文件和数据块之间检查
         
-        Returns:
-            dict: {hash_value: [file_paths], ...}
+        Yields:
+            DuplicateGroup
+        
+        Raises:
+            OperationCancelled: 已被取消
         """
-        hash_map = {}
-        file_list = []
+        _hash_factory(algorithm)  # 尽早报告不支持的算法
+        if prefilter == 'fingerprint':
+            stage_func, stage_args, whole_file_limit = _fingerprint_file, (FINGERPRINT_SAMPLE_SIZE,), None
+        elif prefilter == 'sample':
+            stage_func, stage_args, whole_file_limit = (
+                _partial_hash_file, (algorithm, DUPLICATE_SAMPLE_SIZE), DUPLICATE_SAMPLE_SIZE * 2
+            )
+        else:
+            raise ValueError(f"不支持的预筛方式: {prefilter}")
         
-        # 收集所有文件
-        for root, dirs, files in os.walk(directory):
-            for file in files:
-                file_path = os.path.join(root, file)
-                file_list.append(file_path)
+        # 第 1 步：合并硬链接，再按大小分组
+        inodes = {}  # (dev, ino) -> inode 信息
+        for file_path, size, dev, ino, nlink, mtime_ns, is_symlink in \
+                HashService._collect_files(directory, cancel_token):
+            inode = inodes.get((dev, ino))
+            if inode is None:
+                inode = inodes[(dev, ino)] = {
+                    'dev': dev, 'ino': ino, 'size': size, 'nlink': nlink,
+                    'mtime_ns': mtime_ns, 'paths': [], 'links_seen': 0
+                }
+            inode['paths'].append(file_path)
+            if not is_symlink:
+                inode['links_seen'] += 1
         
-        total = len(file_list)
+        size_groups = {}
+        for inode in inodes.values():
+            size_groups.setdefault(inode['size'], []).append(inode)
+        del inodes
         
-        # 计算每个文件的哈希值
-        for idx, file_path in enumerate(file_list):
-            try:
-                file_hash = HashService.calculate_hash(file_path, algorithm)
-                
-                if file_hash not in hash_map:
-                    hash_map[file_hash] = []
-                hash_map[file_hash].append(file_path)
-                
-                if progress_callback:
-                    progress_callback(idx + 1, total)
-                    
-            except Exception:
+        # 每个 inode 用第一个路径代表；同一大小的连续提交，便于尽早完成整组
+        candidates = []
+        inode_of = {}
+        remaining = {}
+        for size, group in size_groups.items():
+            if len(group) > 1:
+                remaining[size] = len(group)
+                for inode in group:
+                    inode_of[inode['paths'][0]] = inode
+                    candidates.append(inode['paths'][0])
+        del size_groups
+        
+        # 第 2 步：大小相同的 inode 做预筛
+        partial_groups = {}  # size -> {partial_hash: [inode, ...]}
+        full_groups = []
+        total = len(candidates)
+        for idx, (file_path, partial_hash) in enumerate(_iter_parallel(
+                stage_func, candidates, stage_args, max_workers, False, cancel_token)):
+            inode = inode_of[file_path]
+            size = inode['size']
+            if partial_hash is not None:
+                partial_groups.setdefault(size, {}).setdefault(partial_hash, []).append(inode)
+            if progress_callback:
+                progress_callback(idx + 1, total)
+            
+            remaining[size] -= 1
+            if remaining[size]:
+                continue
+            del remaining[size]
+            for partial_hash, group in partial_groups.pop(size, {}).items():
+                if len(group) < 2:
+                    continue
+                if whole_file_limit is not None and size <= whole_file_limit:
+                    yield DuplicateGroup(partial_hash, size, group)
+                else:
+                    full_groups.append(group)
+        
+        # 第 3 步：预筛结果仍相同的 inode 计算完整哈希
+        full_candidates = []
+        group_of = {}
+        remaining = []
+        for group_id, group in enumerate(full_groups):
+            remaining.append(len(group))
+            for inode in group:
+                group_of[inode['paths'][0]] = group_id
+                full_candidates.append(inode['paths'][0])
+        del full_groups
+        
+        hash_groups = {}  # group_id -> {hash_value: [inode, ...]}
+        total = len(full_candidates)
+        for idx, (file_path, file_hash) in enumerate(HashService.iter_hashes(
+                full_candidates, algorithm, max_workers, cancel_token=cancel_token)):
+            group_id = group_of[file_path]
+            if file_hash is not None:
+                hash_groups.setdefault(group_id, {}).setdefault(file_hash, []).append(inode_of[file_path])
+            if progress_callback:
+                progress_callback(idx + 1, total)
+            
+            remaining[group_id] -= 1
+            if remaining[group_id]:
                 continue
+            for file_hash, group in hash_groups.pop(group_id, {}).items():
+                if len(group) > 1:
+                    yield DuplicateGroup(file_hash, group[0]['size'], group)
+    
+    @staticmethod
+    def replace_with_hardlinks(groups, progress_callback=None, cancel_token=None):
+        """把重复文件批量替换为指向同一 inode 的硬链接
+        
+        每组在每个设备上保留一个 inode（见 DuplicateGroup.kept_inodes），
+        其余 inode 的路径逐个替换为指向保留文件的硬链接：先在同目录
+        创建临时链接，再用 os.replace 原子替换。替换前核对设备、inode、
+        大小和修改时间，自扫描以来有变化的文件跳过；符号链接不处理。
         
-        # 返回只有重复的文件（哈希值对应多个文件）
-        duplicates = {h: paths for h, paths in hash_map.items() if len(paths) > 1}
-        return duplicates
+        Args:
+            groups: DuplicateGroup 序列
+            progress_callback: 进度回调函数 (current, total)，按组计
+            cancel_token: CancellationToken，在组之间检查
+        
+        Returns:
+            dict: {'linked': 替换的路径数, 'reclaimed': 释放的字节数,
+                   'failed': [(file_path, 原因), ...]}
+        
+        Raises:
+            OperationCancelled: 已被取消（已完成的替换保留）
+        """
+        groups = list(groups)
+        total = len(groups)
+        result = {'linked': 0, 'reclaimed': 0, 'failed': []}
+        
+        for idx, group in enumerate(groups):
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            
+            for keep in group.kept_inodes():
+                target = keep['paths'][0]
+                if not _inode_unchanged(target, keep, follow_symlinks=True):
+                    for inode in group.inodes:
+                        if inode is not keep and inode['dev'] == keep['dev']:
+                            result['failed'].extend((path, "保留的文件已变化") for path in inode['paths'])
+                    continue
+                
+                for inode in group.inodes:
+                    if inode is keep or inode['dev'] != keep['dev']:
+                        continue
+                    replaced = 0
+                    for path in inode['paths']:
+                        if os.path.islink(path):
+                            continue
+                        if not _inode_unchanged(path, inode, follow_symlinks=False):
+                            result['failed'].append((path, "文件自扫描后已变化"))
+                            continue
+                        try:
+                            _replace_with_link(target, path)
+                            replaced += 1
+                        except OSError as e:
+                            result['failed'].append((path, str(e)))
+                    result['linked'] += replaced
+                    if replaced and replaced == inode['links_seen'] and inode['nlink'] <= replaced:
+                        result['reclaimed'] += inode['size']
+            
+            if progress_callback:
+                progress_callback(idx + 1, total)
+        
+        return result
+
@@ -0,0 +1,224 @@
+"""
+目录列表缓存服务模块 - 进程内共享的目录列表缓存
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from .dir_listing import list_directory
+from .fs_watcher import get_directory_watcher
+
+
+class ListingCache:
+    """目录列表缓存
+
+    以目录路径为键缓存 scan_directory 的结果，两个面板、所有标签页
+    以及前进/后退共享同一份数据。
+
+    - 有 inotify 监视的目录：收到变化事件即失效，命中时不做任何 I/O。
+      列表中子目录的修改时间随子目录内容变化，而上级目录收不到事件，
+      因此同时监视各个子目录，其 mtime 与列表中的不同时使上级失效
+    - 无监视的目录（含子目录超过 CHILD_WATCH_LIMIT 个的目录）：命中前
+      比较目录 mtime（一次 stat），子目录的修改时间可能滞后
+    - 按 LRU 淘汰，总条目数不超过 max_entries
+    """
+
+    CHILD_WATCH_LIMIT = 256  # 每个目录最多监视的子目录数，避免耗尽系统 watch 配额
+
+    def __init__(self, max_entries=500000, watcher=None):
+        self.max_entries = max_entries
+        self._watcher = watcher
+        self._lock = threading.Lock()
+        self._listings = OrderedDict()  # path -> (entries, mtime_ns, watched, child_mtimes)
+        self._total_entries = 0
+
+    def get(self, path, validate=True):
+        """获取缓存的目录列表
+
+        Args:
+            path: 目录路径
+            validate: 对未被监视的目录是否用 mtime 校验；为 False 时
+                      只返回受监视（无需 I/O 即可确认有效）的结果
+
+        Returns:
+            tuple 或 None: ((name, is_dir, size, mtime), ...)
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            cached = self._listings.get(path)
+        if cached is None:
+            return None
+
+        entries, mtime_ns, watched, _ = cached
+        if not watched:
+            if not validate:
+                return None
+            try:
+                if os.stat(path).st_mtime_ns != mtime_ns:
+                    self.invalidate(path)
+                    return None
+            except OSError:
+                self.invalidate(path)
+                return None
+
+        with self._lock:
+            if self._listings.get(path) is not cached:
+                return None  # 校验期间已失效
+            self._listings.move_to_end(path)
+        return entries
+
+    def list_directory(self, path):
+        """读取目录列表，优先使用缓存
+
+        Raises:
+            OSError: 目录不存在或无权限
+        """
+        entries = self.get(path)
+        if entries is None:
+            mtime_ns = os.stat(path).st_mtime_ns
+            entries = list_directory(path)
+            entries = self.put(path, entries, mtime_ns)
+        return entries
+
+    def put(self, path, entries, mtime_ns):
+        """写入目录列表
+
+        Args:
+            path: 目录路径
+            entries: 目录条目
+            mtime_ns: 开始读取前目录的 mtime，用于发现读取期间的变化
+
+        Returns:
+            tuple: 缓存中保存的（不可变）条目
+        """
+        path = os.path.abspath(path)
+        entries = tuple(entries)
+        if len(entries) > self.max_entries:
+            return entries
+
+        # 先撤销旧列表的监视：同一回调对同一目录只登记一次，新旧列表不能共用
+        self.invalidate(path)
+        child_mtimes = {name: mtime for name, is_dir, _, mtime in entries if is_dir and name != '..'}
+        watched = self._watch(path, child_mtimes)
+        if watched:
+            # 读取与开始监视之间目录若有变化，则不缓存这份列表
+            try:
+                changed = os.stat(path).st_mtime_ns != mtime_ns or any(
+                    os.stat(os.path.join(path, name)).st_mtime != mtime
+                    for name, mtime in child_mtimes.items()
+                )
+            except OSError:
+                changed = True
+            if changed:
+                self._unwatch(path, child_mtimes)
+                return entries
+        else:
+            child_mtimes = {}
+
+        with self._lock:
+            old = self._listings.pop(path, None)
+            if old is not None:
+                self._total_entries -= len(old[0])
+            self._listings[path] = (entries, mtime_ns, watched, child_mtimes)
+            self._total_entries += len(entries)
+            evicted = self._evict()
+
+        for evicted_path, evicted_children in evicted:
+            self._unwatch(evicted_path, evicted_children)
+        return entries
+
+    def invalidate(self, path):
+        """使某个目录的缓存失效"""
+        path = os.path.abspath(path)
+        with self._lock:
+            old = self._listings.pop(path, None)
+            if old is not None:
+                self._total_entries -= len(old[0])
+        if old is not None and old[2]:
+            self._unwatch(path, old[3])
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            watched = [(path, cached[3]) for path, cached in self._listings.items() if cached[2]]
+            self._listings.clear()
+            self._total_entries = 0
+        for path, child_mtimes in watched:
+            self._unwatch(path, child_mtimes)
+
+    def _evict(self):
+        """按 LRU 淘汰，返回被淘汰且处于监视中的 (路径, 子目录) 列表（需持有锁）"""
+        evicted = []
+        while self._total_entries > self.max_entries and self._listings:
+            path, (entries, _, watched, child_mtimes) = self._listings.popitem(last=False)
+            self._total_entries -= len(entries)
+            if watched:
+                evicted.append((path, child_mtimes))
+        return evicted
+
+    def _watch(self, path, child_mtimes):
+        """监视目录及其子目录，任何一个无法监视时全部撤销并返回 False"""
+        if self._watcher is None or len(child_mtimes) > self.CHILD_WATCH_LIMIT:
+            return False
+        if not self._watcher.watch(path, self._on_directory_changed):
+            return False
+        watched_children = []
+        for name in child_mtimes:
+            child = os.path.join(path, name)
+            if not self._watcher.watch(child, self._on_child_changed):
+                self._watcher.unwatch(path, self._on_directory_changed)
+                for watched_child in watched_children:
+                    self._watcher.unwatch(watched_child, self._on_child_changed)
+                return False
+            watched_children.append(child)
+        return True
+
+    def _unwatch(self, path, child_mtimes=()):
+        if self._watcher is not None:
+            self._watcher.unwatch(path, self._on_directory_changed)
+            for name in child_mtimes:
+                self._watcher.unwatch(os.path.join(path, name), self._on_child_changed)
+
+    def _on_child_changed(self, child, name):
+        """监视线程回调：已缓存目录的某个子目录内发生变化
+
+        只有子目录本身的 mtime 与上级列表中记录的不同时才使上级失效，
+        子目录中文件内容的写入不影响上级列表。
+        """
+        parent = os.path.dirname(child)
+        with self._lock:
+            cached = self._listings.get(parent)
+        if cached is None:
+            return
+        recorded = cached[3].get(os.path.basename(child))
+        try:
+            current = os.stat(child).st_mtime
+        except OSError:
+            current = None  # 子目录已被删除，上级目录自身也会收到事件
+        if current != recorded:
+            self.invalidate(parent)
+
+    def _on_directory_changed(self, path, name):
+        """监视线程回调：目录内容变化"""
+        self.invalidate(path)
+        # 子目录内容变化会改变它在上级目录列表中的修改时间
+        parent = os.path.dirname(path)
+        if parent != path:
+            with self._lock:
+                cached = parent in self._listings
+            if cached:
+                self.invalidate(parent)
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_listing_cache():
+    """获取进程内共享的目录列表缓存"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ListingCache(watcher=get_directory_watcher())
+        return _shared_cache
@@ -0,0 +1,228 @@
+"""
+名称匹配服务模块 - 编译一次、可批量使用的文件名匹配器
+"""
+
+import functools
+import operator
+import os
+import re
+from itertools import compress, repeat
+
+
+def wildcard_to_regex(pattern):
+    """把通配符模式转换为锚定首尾的正则表达式
+
+    * 匹配任意字符串，? 匹配单个字符，[seq] / [!seq] 匹配字符集合，
+    其余字符按字面匹配。
+    """
+    parts = ['^']
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        i += 1
+        if c == '*':
+            if parts[-1] != '.*':  # 连续的 * 合并，避免回溯
+                parts.append('.*')
+        elif c == '?':
+            parts.append('.')
+        elif c == '[':
+            j = i
+            if j < n and pattern[j] == '!':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            while j < n and pattern[j] != ']':
+                j += 1
+            if j >= n:
+                parts.append(r'\[')
+                continue
+            parts.append(_translate_class(pattern[i:j]))
+            i = j + 1
+        else:
+            parts.append(re.escape(c))
+    parts.append('$')
+    return ''.join(parts)
+
+
+def _translate_class(chars):
+    """把通配符字符集合（不含方括号）转换为正则字符类，反向的范围被忽略"""
+    negate = chars.startswith('!')
+    if negate:
+        chars = chars[1:]
+    items = []
+    i = 0
+    while i < len(chars):
+        if i + 2 < len(chars) and chars[i + 1] == '-':
+            if chars[i] <= chars[i + 2]:
+                items.append(f'{re.escape(chars[i])}-{re.escape(chars[i + 2])}')
+            i += 3
+        else:
+            items.append(re.escape(chars[i]))
+            i += 1
+    if not items:
+        return '.' if negate else '(?!)'
+    return '[' + ('^' if negate else '') + ''.join(items) + ']'
+
+
+def _normalize_extension(ext):
+    ext = ext.strip().lower()
+    if ext and not ext.startswith('.'):
+        ext = '.' + ext
+    return ext
+
+
+class PatternMatcher:
+    """已编译的文件名匹配条件
+
+    模式在构造时只翻译、编译一次，匹配不区分大小写。
+    简单模式（如 *abc*、abc*、*.txt、不含元字符的正则）直接使用字符串方法，
+    其余模式使用预编译的正则表达式。扩展名列表预先转成小写集合。
+
+    mode:
+        wildcard: 通配符整名匹配（* ? [seq]）
+        regex: 正则表达式在名称中搜索
+        literal: 名称包含该文本
+
+    kind 为 all、exact、prefix、suffix、contains、wildcard、regex 之一。
+
+    Raises:
+        re.error: 正则表达式无效
+    """
+
+    def __init__(self, pattern, mode='wildcard', extensions=None):
+        self.pattern = pattern
+        self.mode = mode
+        self.literal = ''
+        self.extensions = None
+        if extensions:
+            self.extensions = frozenset(filter(None, map(_normalize_extension, extensions))) or None
+
+        if mode == 'regex':
+            self.regex_source = pattern
+            self.regex = re.compile(pattern, re.IGNORECASE)
+            if re.escape(pattern) == pattern:
+                self.kind = 'contains' if pattern else 'all'
+                self.literal = pattern.lower()
+            else:
+                self.kind = 'regex'
+            return
+
+        if mode == 'literal':
+            self.regex_source = re.escape(pattern)
+            self.regex = re.compile(self.regex_source, re.IGNORECASE)
+            self.kind = 'contains' if pattern else 'all'
+            self.literal = pattern.lower()
+            return
+
+        # 通配符与小写名称匹配，不依赖 IGNORECASE（字符范围按小写解释）
+        lowered = pattern.lower()
+        self.regex_source = wildcard_to_regex(lowered)
+        self.regex = re.compile(self.regex_source, re.DOTALL)
+        if lowered.strip('*') == '':
+            self.kind = 'all'
+        elif '?' in lowered or '[' in lowered or '*' in lowered.strip('*'):
+            self.kind = 'wildcard'
+        else:
+            self.literal = lowered.strip('*')
+            starts = lowered.startswith('*')
+            ends = lowered.endswith('*')
+            if starts and ends:
+                self.kind = 'contains'
+            elif ends:
+                self.kind = 'prefix'
+            elif starts:
+                self.kind = 'suffix'
+            else:
+                self.kind = 'exact'
+
+    def select(self, lower_names):
+        """对小写名称序列逐个给出是否匹配（不检查扩展名）"""
+        if self.kind == 'contains':
+            return map(operator.contains, lower_names, repeat(self.literal))
+        if self.kind == 'prefix':
+            return map(str.startswith, lower_names, repeat(self.literal))
+        if self.kind == 'suffix':
+            return map(str.endswith, lower_names, repeat(self.literal))
+        if self.kind == 'exact':
+            return map(self.literal.__eq__, lower_names)
+        if self.kind == 'all':
+            return repeat(True)
+        return map(self.regex.search, lower_names)
+
+    def match(self, name):
+        """名称是否匹配（不检查扩展名）"""
+        if self.kind == 'all':
+            return True
+        if self.kind == 'regex':
+            return self.regex.search(name) is not None
+        return bool(next(self.select((name.lower(),))))
+
+    def matches_extension(self, name):
+        """名称的扩展名是否在扩展名集合中（未指定扩展名时总为 True）"""
+        if self.extensions is None:
+            return True
+        return os.path.splitext(name)[1].lower() in self.extensions
+
+    def filter(self, names, use_extensions=True):
+        """批量筛选名称
+
+        Args:
+            names: 名称序列
+            use_extensions: 是否同时检查扩展名（目录名通常不检查）
+
+        Returns:
+            list: 匹配的名称，保持原顺序
+        """
+        if not isinstance(names, (list, tuple)):
+            names = list(names)
+        if use_extensions and self.extensions is not None:
+            names = [name for name in names if self.matches_extension(name)]
+        if self.kind == 'all':
+            return list(names)
+        if self.kind == 'regex':
+            return list(compress(names, map(self.regex.search, names)))
+        return list(compress(names, self.select(map(str.lower, names))))
+
+    def sub(self, replacement, name):
+        """把名称中匹配的部分替换为 replacement（按字面插入，不解析 \\1 等引用）"""
+        return self.regex.sub(lambda _: replacement, name)
+
+    def narrows(self, previous):
+        """本条件的匹配结果是否必然是 previous 结果的子集"""
+        if previous.extensions is not None:
+            if self.extensions is None or not self.extensions <= previous.extensions:
+                return False
+        if previous.kind == 'all':
+            return True
+        literal_kinds = ('contains', 'prefix', 'suffix', 'exact')
+        if previous.kind == 'contains' and self.kind in literal_kinds:
+            return previous.literal in self.literal
+        if previous.kind == 'prefix' and self.kind in ('prefix', 'exact'):
+            return self.literal.startswith(previous.literal)
+        if previous.kind == 'suffix' and self.kind in ('suffix', 'exact'):
+            return self.literal.endswith(previous.literal)
+        if previous.kind == 'exact' and self.kind == 'exact':
+            return self.literal == previous.literal
+        if previous.mode == self.mode == 'wildcard':
+            # 在以 * 结尾的通配符后继续输入，只会缩小匹配范围
+            old = previous.pattern.lower()
+            return (old.endswith('*') and '[' not in old
+                    and self.pattern.lower().startswith(old))
+        return False
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_matcher(pattern, mode, extensions):
+    return PatternMatcher(pattern, mode, extensions)
+
+
+def get_matcher(pattern, mode='wildcard', extensions=None):
+    """获取（缓存的）匹配器，相同条件重复调用时不再重新编译
+
+    Raises:
+        re.error: 正则表达式无效
+    """
+    if extensions:
+        extensions = tuple(extensions)
+    return _cached_matcher(pattern, mode, extensions or None)
@@ -0,0 +1,223 @@
+"""
+组合查询模块 - 解析 name:*.iso size:>1G modified:<30d 形式的搜索条件
+"""
+
+import re
+import shlex
+import time
+from datetime import datetime
+
+from .pattern_matcher import get_matcher
+
+SIZE_UNITS = {
+    '': 1, 'b': 1,
+    'k': 1024, 'kb': 1024,
+    'm': 1024 ** 2, 'mb': 1024 ** 2,
+    'g': 1024 ** 3, 'gb': 1024 ** 3,
+    't': 1024 ** 4, 'tb': 1024 ** 4,
+}
+
+AGE_UNITS = {
+    's': 1, 'min': 60, 'h': 3600,
+    'd': 86400, 'w': 7 * 86400, 'mo': 30 * 86400, 'y': 365 * 86400,
+}
+
+_COMPARISON = re.compile(r'^(<=|>=|<|>|=)?(.+)$')
+_SIZE = re.compile(r'^(\d+(?:\.\d+)?)\s*([a-z]*)$', re.IGNORECASE)
+_AGE = re.compile(r'^(\d+(?:\.\d+)?)\s*(s|min|h|d|w|mo|y)$', re.IGNORECASE)
+_DATE_FORMATS = ('%Y-%m-%d', '%Y-%m-%d %H:%M', '%Y-%m-%d %H:%M:%S')
+
+
+def parse_size(text):
+    """解析大小（如 100、512k、1.5G、10MB，按 1024 进位）
+
+    Raises:
+        ValueError: 格式无效
+    """
+    match = _SIZE.match(text.strip())
+    if match is None or match.group(2).lower() not in SIZE_UNITS:
+        raise ValueError(f"无效的大小: {text}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).lower()])
+
+
+def _parse_time(text, now):
+    """解析时间值，返回 (时间戳, 是否为相对时长)
+
+    相对时长（如 30d、12h、2w）返回 now 减去时长；日期（如 2024-01-31）
+    返回当天零点的本地时间戳。
+    """
+    text = text.strip()
+    match = _AGE.match(text)
+    if match is not None:
+        return now - float(match.group(1)) * AGE_UNITS[match.group(2).lower()], True
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).timestamp(), False
+        except ValueError:
+            continue
+    raise ValueError(f"无效的时间: {text}")
+
+
+def _split_comparison(value):
+    match = _COMPARISON.match(value)
+    if match is None:
+        raise ValueError(f"缺少比较值: {value}")
+    return match.group(1) or '=', match.group(2)
+
+
+class SearchQuery:
+    """组合搜索条件
+
+    由空格分隔的若干条件组成，各条件同时满足才算匹配：
+
+        name:*.iso        名称通配符（不带前缀的词同样视为名称条件）
+        ext:iso,img       扩展名
+        type:file|dir     只要文件或只要文件夹
+        size:>1G          文件大小，支持 < <= > >= = 以及 1M..2G 范围
+        modified:<30d     修改时间：相对时长（s min h d w mo y）表示
+                          “距今”，<30d 即 30 天内修改过；日期
+                          （2024-01-31）按日历比较，=日期表示当天
+
+    含空格的值可以加引号（name:"my file*"）。
+    匹配分两级：matches_name() 只看名称和类型，不访问磁盘；
+    needs_stat 为 True 时，名称通过的条目再由 matches_stat() 检查。
+    指定了大小条件时只匹配文件。
+
+    Raises:
+        ValueError: 条件无法解析
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.kind = None  # None、'file' 或 'dir'
+        self.min_size = None
+        self.max_size = None
+        self.min_mtime = None
+        self.max_mtime = None
+
+        names = []
+        extensions = []
+        now = time.time()
+        try:
+            tokens = shlex.split(text)
+        except ValueError as e:
+            raise ValueError(f"无效的查询: {e}") from None
+        for token in tokens:
+            key, sep, value = token.partition(':')
+            key = key.lower()
+            if not sep or key not in ('name', 'ext', 'type', 'size', 'modified'):
+                names.append(token)
+            elif not value:
+                raise ValueError(f"条件缺少值: {token}")
+            elif key == 'name':
+                names.append(value)
+            elif key == 'ext':
+                extensions.extend(ext for ext in value.split(',') if ext.strip())
+            elif key == 'type':
+                if value.lower() not in ('file', 'dir'):
+                    raise ValueError(f"无效的类型: {value}")
+                self.kind = value.lower()
+            elif key == 'size':
+                self._parse_size_condition(value)
+            else:
+                self._parse_modified_condition(value, now)
+
+        if self.min_size is not None or self.max_size is not None:
+            if self.kind == 'dir':
+                raise ValueError("文件夹没有大小条件")
+            self.kind = 'file'
+
+        # 第一个名称条件与扩展名合成一个匹配器，其余名称条件依次检查
+        self.matcher = get_matcher(names[0] if names else '*', 'wildcard', extensions or None)
+        self.extra_matchers = [get_matcher(name) for name in names[1:]]
+
+    def _parse_size_condition(self, value):
+        if '..' in value:
+            low, _, high = value.partition('..')
+            self._narrow_size(parse_size(low) if low else None, parse_size(high) if high else None)
+            return
+        op, operand = _split_comparison(value)
+        size = parse_size(operand)
+        if op == '<':
+            self._narrow_size(None, size - 1)
+        elif op == '<=':
+            self._narrow_size(None, size)
+        elif op == '>':
+            self._narrow_size(size + 1, None)
+        elif op == '>=':
+            self._narrow_size(size, None)
+        else:
+            self._narrow_size(size, size)
+
+    def _narrow_size(self, low, high):
+        if low is not None:
+            self.min_size = low if self.min_size is None else max(self.min_size, low)
+        if high is not None:
+            self.max_size = high if self.max_size is None else min(self.max_size, high)
+
+    def _parse_modified_condition(self, value, now):
+        op, operand = _split_comparison(value)
+        timestamp, relative = _parse_time(operand, now)
+        if relative:
+            # 距今时长越小，修改时间越晚：<30d 即修改时间晚于 30 天前
+            op = {'<': '>', '<=': '>=', '>': '<', '>=': '<='}.get(op, op)
+        if op in ('>', '>='):
+            if not relative and op == '>':
+                timestamp += 86400  # >日期：次日零点之后
+            self._narrow_mtime(timestamp, None)
+        elif op in ('<', '<='):
+            if not relative and op == '<=':
+                timestamp += 86400  # <=日期：包含当天
+            self._narrow_mtime(None, timestamp)
+        elif relative:
+            raise ValueError(f"相对时间不支持 = 比较: {value}")
+        else:
+            self._narrow_mtime(timestamp, timestamp + 86400)
+
+    def _narrow_mtime(self, low, high):
+        if low is not None:
+            self.min_mtime = low if self.min_mtime is None else max(self.min_mtime, low)
+        if high is not None:
+            self.max_mtime = high if self.max_mtime is None else min(self.max_mtime, high)
+
+    @property
+    def include_dirs(self):
+        """是否可能匹配文件夹"""
+        return self.kind != 'file'
+
+    @property
+    def needs_stat(self):
+        """是否有需要 stat 信息的条件"""
+        return (self.min_size is not None or self.max_size is not None
+                or self.min_mtime is not None or self.max_mtime is not None)
+
+    def matches_name(self, name, is_dir):
+        """名称与类型条件（不访问磁盘）"""
+        if is_dir:
+            if self.kind == 'file' or not self.matcher.match(name):
+                return False
+        elif self.kind == 'dir' or not (self.matcher.matches_extension(name)
+                                        and self.matcher.match(name)):
+            return False
+        return all(matcher.match(name) for matcher in self.extra_matchers)
+
+    def filter_names(self, names, is_dir):
+        """批量筛选同一目录下的文件名或文件夹名（不访问磁盘）"""
+        if self.kind == ('file' if is_dir else 'dir'):
+            return []
+        names = self.matcher.filter(names, use_extensions=not is_dir)
+        for matcher in self.extra_matchers:
+            names = matcher.filter(names, use_extensions=False)
+        return names
+
+    def matches_stat(self, size, mtime):
+        """大小与修改时间条件（修改时间上限不含边界）"""
+        if self.min_size is not None and size < self.min_size:
+            return False
+        if self.max_size is not None and size > self.max_size:
+            return False
+        if self.min_mtime is not None and mtime < self.min_mtime:
+            return False
+        if self.max_mtime is not None and mtime >= self.max_mtime:
+            return False
+        return True
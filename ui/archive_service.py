@@ -6,6 +6,7 @@ import os
 import zipfile
 import shutil
 from pathlib import Path
+from services.dir_walker import walk_parallel
 
 
 class ArchiveService:
@@ -101,7 +102,7 @@ class ArchiveService:
             if os.path.isfile(path):
                 count += 1
             elif os.path.isdir(path):
-                for root, dirs, files in os.walk(path):
+                for root, dirs, files in walk_parallel(path):
                     count += len(files)
         return count
     
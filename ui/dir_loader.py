@@ -0,0 +1,81 @@
+"""
+后台目录加载模块 - 在工作线程中枚举目录并分批回传
+"""
+
+import os
+import time
+from PyQt5.QtCore import QThread, pyqtSignal
+from services.dir_listing import scan_directory
+from services.listing_cache import get_listing_cache
+
+
+class DirectoryLoadWorker(QThread):
+    """目录加载工作线程
+
+    第一批条目在 FIRST_BATCH_INTERVAL 内送出，保证首屏尽快显示；
+    之后按 BATCH_INTERVAL 节流，避免大量信号挤占界面事件队列。
+    所有信号都携带 generation，面板据此丢弃已过期加载的结果。
+    缓存命中时直接一次性送出；完整读取的结果写回共享缓存。
+    """
+
+    batch_ready = pyqtSignal(int, list, bool)  # generation, entries, is_last
+    permission_denied = pyqtSignal(int)  # generation
+    error = pyqtSignal(int, str)  # generation, message
+
+    FIRST_BATCH_INTERVAL = 0.05  # 秒
+    BATCH_INTERVAL = 0.2  # 秒
+
+    # 运行中的线程需保持引用，避免面板销毁时线程对象被提前回收
+    _running = set()
+
+    def __init__(self, path, generation):
+        super().__init__()
+        self.path = path
+        self.generation = generation
+        self.cancelled = False
+        self.finished.connect(self._on_thread_finished)
+
+    def start(self):
+        DirectoryLoadWorker._running.add(self)
+        super().start()
+
+    def cancel(self):
+        """取消加载（在下一个条目处生效）"""
+        self.cancelled = True
+
+    def run(self):
+        """执行加载"""
+        cache = get_listing_cache()
+        entries = []
+        batch = []
+        deadline = time.monotonic() + self.FIRST_BATCH_INTERVAL
+        try:
+            cached = cache.get(self.path)
+            if cached is not None:
+                if not self.cancelled:
+                    self.batch_ready.emit(self.generation, list(cached), True)
+                return
+            
+            mtime_ns = os.stat(self.path).st_mtime_ns
+            for entry in scan_directory(self.path):
+                if self.cancelled:
+                    return
+                entries.append(entry)
+                batch.append(entry)
+                now = time.monotonic()
+                if now >= deadline:
+                    self.batch_ready.emit(self.generation, batch, False)
+                    batch = []
+                    deadline = now + self.BATCH_INTERVAL
+            if not self.cancelled:
+                cache.put(self.path, entries, mtime_ns)
+                self.batch_ready.emit(self.generation, batch, True)
+        except PermissionError:
+            if not self.cancelled:
+                self.permission_denied.emit(self.generation)
+        except Exception as e:
+            if not self.cancelled:
+                self.error.emit(self.generation, str(e))
+
+    def _on_thread_finished(self):
+        DirectoryLoadWorker._running.discard(self)
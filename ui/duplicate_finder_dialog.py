@@ -5,36 +5,51 @@
 import os
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
-    QTableWidget, QTableWidgetItem, QMessageBox, QFileDialog,
+    QTreeView, QHeaderView, QAbstractItemView, QMessageBox, QFileDialog,
     QProgressBar, QGroupBox, QComboBox, QCheckBox, QLineEdit
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
-from services.hash_service import HashService
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
+from services.hash_service import HashService, BLAKE2_MAX_DIGEST_BITS
+from services.cancellation import CancellationToken, OperationCancelled
+from .duplicate_result_model import DuplicateResultModel
 
 
 class DuplicateFinderWorker(QThread):
-    """重复文件查找工作线程"""
+    """重复文件查找工作线程
+    
+    每确认一组重复文件就发出 group_found，取消后在当前数据块读完前停止。
+    """
     
     progress = pyqtSignal(int, int)  # current, total
+    group_found = pyqtSignal(object)  # DuplicateGroup
     finished = pyqtSignal(dict)  # duplicates dict
     error = pyqtSignal(str)
     
-    def __init__(self, directory, algorithm='md5'):
+    def __init__(self, directory, algorithm='md5', prefilter='sample'):
         super().__init__()
         self.directory = directory
         self.algorithm = algorithm
+        self.prefilter = prefilter
         self.cancelled = False
+        self.cancel_token = CancellationToken()
     
     def run(self):
         """执行查找"""
+        duplicates = {}
         try:
-            duplicates = HashService.find_duplicates(
+            for group in HashService.iter_duplicate_groups(
                 self.directory,
                 self.algorithm,
-                self.progress.emit
-            )
+                self.progress.emit,
+                prefilter=self.prefilter,
+                cancel_token=self.cancel_token
+            ):
+                duplicates[group.hash_value] = group.paths
+                self.group_found.emit(group)
             if not self.cancelled:
                 self.finished.emit(duplicates)
+        except OperationCancelled:
+            pass
         except Exception as e:
             if not self.cancelled:
                 self.error.emit(str(e))
@@ -42,16 +57,49 @@ class DuplicateFinderWorker(QThread):
     def cancel(self):
         """取消查找"""
         self.cancelled = True
+        self.cancel_token.cancel()
+
+
+class HardlinkWorker(QThread):
+    """把重复文件替换为硬链接的工作线程"""
+    
+    progress = pyqtSignal(int, int)  # current, total
+    finished = pyqtSignal(dict)  # replace_with_hardlinks 的结果
+    error = pyqtSignal(str)
+    
+    def __init__(self, groups):
+        super().__init__()
+        self.groups = groups
+    
+    def run(self):
+        """执行替换"""
+        try:
+            result = HashService.replace_with_hardlinks(self.groups, self.progress.emit)
+            self.finished.emit(result)
+        except Exception as e:
+            self.error.emit(str(e))
 
 
 class DuplicateFinderDialog(QDialog):
     """重复文件查找对话框"""
     
+    GROUP_FLUSH_INTERVAL_MS = 200  # 实时结果成批送入模型的间隔
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent_window = parent
         self.duplicates = {}
+        self.groups = []
+        self.duplicate_file_count = 0
+        self.reclaimable_total = 0
         self.worker = None
+        self.link_worker = None
+        self.pending_groups = []
+        
+        self.group_flush_timer = QTimer(self)
+        self.group_flush_timer.setSingleShot(True)
+        self.group_flush_timer.setInterval(self.GROUP_FLUSH_INTERVAL_MS)
+        self.group_flush_timer.timeout.connect(self.flush_pending_groups)
         
         self.setWindowTitle("查找重复文件")
         self.setMinimumWidth(800)
@@ -83,8 +131,26 @@ class DuplicateFinderDialog(QDialog):
         algo_layout = QHBoxLayout()
         algo_layout.addWidget(QLabel("哈希算法:"))
         self.algo_combo = QComboBox()
-        self.algo_combo.addItems(["MD5", "SHA1", "SHA256"])
+        self.algo_combo.addItem("BLAKE2b（推荐，速度快）", "blake2b")
+        self.algo_combo.addItem("BLAKE2s", "blake2s")
+        self.algo_combo.addItem("MD5", "md5")
+        self.algo_combo.addItem("SHA1", "sha1")
+        self.algo_combo.addItem("SHA256", "sha256")
+        self.algo_combo.currentIndexChanged.connect(self.on_algorithm_changed)
+        algo_layout.addWidget(self.algo_combo)
+        
+        algo_layout.addWidget(QLabel("摘要长度:"))
+        self.digest_size_combo = QComboBox()
+        algo_layout.addWidget(self.digest_size_combo)
+        
+        algo_layout.addWidget(QLabel("预筛选:"))
+        self.prefilter_combo = QComboBox()
+        self.prefilter_combo.addItem("首尾 64 KB 哈希", "sample")
+        self.prefilter_combo.addItem("快速 64 位指纹", "fingerprint")
+        algo_layout.addWidget(self.prefilter_combo)
+        algo_layout.addStretch()
         settings_layout.addLayout(algo_layout)
+        self.on_algorithm_changed()
         
         # 查找选项
         self.size_only_check = QCheckBox("仅比较文件大小（快速模式）")
@@ -103,17 +169,25 @@ class DuplicateFinderDialog(QDialog):
         result_label.setStyleSheet("font-weight: bold; margin-top: 10px;")
         layout.addWidget(result_label)
         
-        self.result_table = QTableWidget()
-        self.result_table.setColumnCount(4)
-        self.result_table.setHorizontalHeaderLabels(["文件名", "路径", "大小", "哈希值"])
-        self.result_table.horizontalHeader().setStretchLastSection(False)
-        self.result_table.horizontalHeader().setSectionResizeMode(0, QTableWidget.ResizeToContents)
-        self.result_table.horizontalHeader().setSectionResizeMode(1, QTableWidget.Stretch)
-        self.result_table.horizontalHeader().setSectionResizeMode(2, QTableWidget.ResizeToContents)
-        self.result_table.horizontalHeader().setSectionResizeMode(3, QTableWidget.ResizeToContents)
-        self.result_table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.result_table.setSelectionBehavior(QTableWidget.SelectRows)
-        layout.addWidget(self.result_table)
+        # 分组显示，组可折叠；只渲染可见行，顶层分页装载
+        self.result_model = DuplicateResultModel(self)
+        self.result_view = QTreeView()
+        self.result_view.setModel(self.result_model)
+        self.result_view.setUniformRowHeights(True)
+        self.result_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.result_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.result_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        header = self.result_view.header()
+        header.setStretchLastSection(False)
+        header.setSectionResizeMode(0, QHeaderView.Interactive)
+        header.setSectionResizeMode(1, QHeaderView.Stretch)
+        header.setSectionResizeMode(2, QHeaderView.Interactive)
+        header.setSectionResizeMode(3, QHeaderView.Interactive)
+        header.setSectionResizeMode(4, QHeaderView.Interactive)
+        self.result_view.setColumnWidth(0, 260)
+        self.result_view.setSortingEnabled(True)
+        self.result_view.sortByColumn(3, Qt.DescendingOrder)  # 默认按可释放空间排序
+        layout.addWidget(self.result_view)
         
         # 统计信息
         self.stats_label = QLabel("")
@@ -137,6 +211,11 @@ class DuplicateFinderDialog(QDialog):
         delete_btn.clicked.connect(self.delete_selected)
         button_layout.addWidget(delete_btn)
         
+        self.hardlink_btn = QPushButton("替换为硬链接")
+        self.hardlink_btn.setToolTip("每组只保留一份数据，其余文件替换为指向它的硬链接")
+        self.hardlink_btn.clicked.connect(self.replace_with_hardlinks)
+        button_layout.addWidget(self.hardlink_btn)
+        
         button_layout.addStretch()
         
         close_btn = QPushButton("关闭")
@@ -146,6 +225,28 @@ class DuplicateFinderDialog(QDialog):
         layout.addLayout(button_layout)
         self.setLayout(layout)
     
+    def on_algorithm_changed(self, index=None):
+        """切换算法时更新可选的摘要长度（仅 BLAKE2 可配置）"""
+        algorithm = self.algo_combo.currentData()
+        self.digest_size_combo.clear()
+        if algorithm == 'blake2b':
+            bits_options = [512, 256, 128, 64]
+        elif algorithm == 'blake2s':
+            bits_options = [256, 128, 64]
+        else:
+            bits_options = []
+        for bits in bits_options:
+            self.digest_size_combo.addItem(f"{bits} 位", bits)
+        self.digest_size_combo.setEnabled(bool(bits_options))
+    
+    def selected_algorithm(self):
+        """当前选择的算法名（截短的 BLAKE2 带摘要长度，如 blake2b-128）"""
+        algorithm = self.algo_combo.currentData()
+        bits = self.digest_size_combo.currentData()
+        if bits and bits != BLAKE2_MAX_DIGEST_BITS.get(algorithm):
+            return f"{algorithm}-{bits}"
+        return algorithm  # 完整长度使用不带位数的名称
+    
     def browse_directory(self):
         """浏览目录"""
         directory = QFileDialog.getExistingDirectory(self, "选择搜索目录", self.dir_input.text())
@@ -160,7 +261,9 @@ class DuplicateFinderDialog(QDialog):
             return
         
         # 清空结果
-        self.result_table.setRowCount(0)
+        self.group_flush_timer.stop()
+        self.pending_groups = []
+        self.result_model.clear()
         self.duplicates = {}
         
         # 显示进度条
@@ -173,9 +276,14 @@ class DuplicateFinderDialog(QDialog):
         self.cancel_btn.setEnabled(True)
         
         # 启动工作线程
-        algorithm = self.algo_combo.currentText().lower()
-        self.worker = DuplicateFinderWorker(directory, algorithm)
+        algorithm = self.selected_algorithm()
+        prefilter = self.prefilter_combo.currentData()
+        self.groups = []
+        self.duplicate_file_count = 0
+        self.reclaimable_total = 0
+        self.worker = DuplicateFinderWorker(directory, algorithm, prefilter)
         self.worker.progress.connect(self.on_progress)
+        self.worker.group_found.connect(self.on_group_found)
         self.worker.finished.connect(self.on_finished)
         self.worker.error.connect(self.on_error)
         self.worker.start()
@@ -185,6 +293,9 @@ class DuplicateFinderDialog(QDialog):
         if self.worker:
             self.worker.cancel()
             self.worker.wait()
+            self.worker = None
+            self.flush_pending_groups()
+            self.stats_label.setText(f"已取消，{self.stats_text()}")
         
         self.progress_bar.setVisible(False)
         self.find_btn.setEnabled(True)
@@ -195,12 +306,35 @@ class DuplicateFinderDialog(QDialog):
         if total > 0:
             self.progress_bar.setMaximum(total)
             self.progress_bar.setValue(current)
-            self.stats_label.setText(f"正在扫描: {current}/{total} 文件...")
+            self.stats_label.setText(
+                f"正在扫描: {current}/{total} 文件...（已找到 {len(self.duplicates)} 组）"
+            )
+    
+    def on_group_found(self, group):
+        """实时显示新确认的一组重复文件"""
+        if self.sender() is not self.worker:
+            return  # 已取消或已被新的查找替换
+        self.groups.append(group)
+        self.duplicates[group.hash_value] = group.paths
+        self.duplicate_file_count += group.file_count
+        self.reclaimable_total += group.reclaimable
+        self.pending_groups.append(group)
+        if not self.group_flush_timer.isActive():
+            self.group_flush_timer.start()
+    
+    def flush_pending_groups(self):
+        """把积攒的新组成批送入结果模型"""
+        self.group_flush_timer.stop()
+        if self.pending_groups:
+            groups, self.pending_groups = self.pending_groups, []
+            self.result_model.add_groups(groups)
     
     def on_finished(self, duplicates):
         """查找完成"""
-        self.duplicates = duplicates
-        self.display_results()
+        if self.sender() is not self.worker:
+            return
+        self.flush_pending_groups()
+        self.stats_label.setText(self.stats_text())
         
         self.progress_bar.setVisible(False)
         self.find_btn.setEnabled(True)
@@ -208,6 +342,9 @@ class DuplicateFinderDialog(QDialog):
     
     def on_error(self, error_msg):
         """查找错误"""
+        if self.sender() is not self.worker:
+            return
+        self.flush_pending_groups()
         QMessageBox.critical(self, "错误", f"查找失败: {error_msg}")
         self.progress_bar.setVisible(False)
         self.find_btn.setEnabled(True)
@@ -215,45 +352,32 @@ class DuplicateFinderDialog(QDialog):
     
     def display_results(self):
         """显示结果"""
-        self.result_table.setRowCount(0)
-        
-        total_duplicates = 0
-        total_groups = len(self.duplicates)
-        
-        for hash_value, file_paths in self.duplicates.items():
-            for file_path in file_paths:
-                row = self.result_table.rowCount()
-                self.result_table.insertRow(row)
-                
-                file_name = os.path.basename(file_path)
-                file_size = os.path.getsize(file_path)
-                size_str = self.format_size(file_size)
-                
-                self.result_table.setItem(row, 0, QTableWidgetItem(file_name))
-                self.result_table.setItem(row, 1, QTableWidgetItem(file_path))
-                self.result_table.setItem(row, 2, QTableWidgetItem(size_str))
-                
-                hash_item = QTableWidgetItem(hash_value[:16] + "...")
-                hash_item.setToolTip(hash_value)
-                self.result_table.setItem(row, 3, hash_item)
-                
-                total_duplicates += 1
-        
-        self.stats_label.setText(
-            f"找到 {total_groups} 组重复文件，共 {total_duplicates} 个文件"
+        self.group_flush_timer.stop()
+        self.pending_groups = []
+        self.result_model.clear()
+        self.result_model.add_groups(self.groups)
+        self.stats_label.setText(self.stats_text())
+    
+    def stats_text(self):
+        """统计信息文本"""
+        return (
+            f"找到 {len(self.groups)} 组重复文件，共 {self.duplicate_file_count} 个文件，"
+            f"可释放 {self.format_size(self.reclaimable_total)}"
         )
     
     def delete_selected(self):
         """删除选中的文件"""
-        selected_rows = set()
-        for index in self.result_table.selectedIndexes():
-            selected_rows.add(index.row())
+        selected_paths = []
+        for index in self.result_view.selectionModel().selectedRows():
+            file_path = self.result_model.path_at(index)
+            if file_path is not None:
+                selected_paths.append(file_path)
         
-        if not selected_rows:
-            QMessageBox.information(self, "提示", "请先选择要删除的文件")
+        if not selected_paths:
+            QMessageBox.information(self, "提示", "请先选择要删除的文件（展开分组后选择其中的文件）")
             return
         
-        file_count = len(selected_rows)
+        file_count = len(selected_paths)
         reply = QMessageBox.question(
             self,
             "确认删除",
@@ -265,8 +389,7 @@ class DuplicateFinderDialog(QDialog):
             deleted_count = 0
             failed_count = 0
             
-            for row in selected_rows:
-                file_path = self.result_table.item(row, 1).text()
+            for file_path in selected_paths:
                 try:
                     if os.path.isfile(file_path):
                         os.remove(file_path)
@@ -284,6 +407,71 @@ class DuplicateFinderDialog(QDialog):
             # 刷新结果
             self.start_find()
     
+    def replace_with_hardlinks(self):
+        """把所有重复组替换为硬链接"""
+        if self.worker and self.worker.isRunning():
+            QMessageBox.information(self, "提示", "请等待查找完成")
+            return
+        if self.link_worker and self.link_worker.isRunning():
+            return
+        if not self.groups:
+            QMessageBox.information(self, "提示", "没有可替换的重复文件")
+            return
+        
+        reply = QMessageBox.question(
+            self,
+            "确认替换",
+            f"将 {len(self.groups)} 组重复文件替换为硬链接，预计释放 "
+            f"{self.format_size(self.reclaimable_total)}。\n"
+            f"替换后同组文件共享同一份数据，修改其中一个会影响全部。是否继续？",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            return
+        
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setMaximum(len(self.groups))
+        self.find_btn.setEnabled(False)
+        self.hardlink_btn.setEnabled(False)
+        
+        self.link_worker = HardlinkWorker(list(self.groups))
+        self.link_worker.progress.connect(self.on_hardlinks_progress)
+        self.link_worker.finished.connect(self.on_hardlinks_finished)
+        self.link_worker.error.connect(self.on_hardlinks_error)
+        self.link_worker.start()
+    
+    def on_hardlinks_progress(self, current, total):
+        """硬链接替换进度"""
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(current)
+        self.stats_label.setText(f"正在替换: {current}/{total} 组...")
+    
+    def on_hardlinks_finished(self, result):
+        """硬链接替换完成"""
+        self.progress_bar.setVisible(False)
+        self.find_btn.setEnabled(True)
+        self.hardlink_btn.setEnabled(True)
+        
+        message = (
+            f"替换完成！\n已替换: {result['linked']} 个文件\n"
+            f"释放空间: {self.format_size(result['reclaimed'])}\n失败: {len(result['failed'])}"
+        )
+        if result['failed']:
+            details = "\n".join(f"{path}: {reason}" for path, reason in result['failed'][:10])
+            message += f"\n\n{details}"
+        QMessageBox.information(self, "完成", message)
+        
+        # 刷新结果
+        self.start_find()
+    
+    def on_hardlinks_error(self, error_msg):
+        """硬链接替换出错"""
+        self.progress_bar.setVisible(False)
+        self.find_btn.setEnabled(True)
+        self.hardlink_btn.setEnabled(True)
+        QMessageBox.critical(self, "错误", f"替换失败: {error_msg}")
+    
     @staticmethod
     def format_size(size):
         """格式化文件大小"""
@@ -0,0 +1,230 @@
+"""
+重复文件结果模型 - 基于 QAbstractItemModel 的分组、分页、虚拟化结果列表
+"""
+
+import os
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex, QVariant
+from PyQt5.QtGui import QFont
+
+
+class DuplicateResultModel(QAbstractItemModel):
+    """重复文件结果模型
+
+    顶层每行是一组重复文件，子行是组内的文件，配合 QTreeView 可折叠。
+    大小、可释放空间都取自扫描结果，显示和排序都不访问磁盘。
+    顶层行按 PAGE_SIZE 分页装载（canFetchMore/fetchMore），
+    视图滚动到底部时才继续装载。
+
+    子行索引的 internalPointer 指向所属的 DuplicateGroup（顶层行为 None），
+    组的位置因排序或新组插入而变化时，子行索引仍然有效。
+    """
+
+    COLUMNS = ["名称", "路径", "大小", "可释放", "哈希值"]
+    COLUMN_SORT_KEYS = ['name', 'path', 'size', 'wasted', 'hash']
+    PAGE_SIZE = 500
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._entries = []  # [(group, paths, reclaimable), ...]，按当前排序
+        self._row_of = {}  # id(group) -> 行号
+        self._loaded = 0  # 已暴露给视图的顶层行数
+        self._sort_by = None
+        self._descending = False
+        self._bold_font = QFont()
+        self._bold_font.setBold(True)
+
+    # ---- Qt 模型接口 ----
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column, None)
+        return self.createIndex(row, column, self._entries[parent.row()][0])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        group = index.internalPointer()
+        if group is None:
+            return QModelIndex()
+        return self.createIndex(self._row_of[id(group)], 0, None)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return self._loaded
+        if parent.internalPointer() is None and parent.column() == 0:
+            return len(self._entries[parent.row()][1])
+        return 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.COLUMNS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+        column = index.column()
+
+        group = index.internalPointer()
+        if group is None:
+            group, paths, reclaimable = self._entries[index.row()]
+            if role == Qt.DisplayRole:
+                if column == 0:
+                    return f"{os.path.basename(paths[0])}（{len(paths)} 个文件）"
+                if column == 2:
+                    return self.format_size(group.size)
+                if column == 3:
+                    return self.format_size(reclaimable)
+                if column == 4:
+                    return group.hash_value[:16] + "..."
+            elif role == Qt.ToolTipRole and column == 4:
+                return group.hash_value
+            elif role == Qt.FontRole:
+                return self._bold_font
+            return QVariant()
+
+        paths = self._entries[self._row_of[id(group)]][1]
+        if role == Qt.DisplayRole:
+            file_path = paths[index.row()]
+            if column == 0:
+                return os.path.basename(file_path)
+            if column == 1:
+                return file_path
+            if column == 2:
+                return self.format_size(group.size)
+        elif role == Qt.ToolTipRole and column == 1:
+            return paths[index.row()]
+        return QVariant()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < len(self._entries)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.PAGE_SIZE, len(self._entries) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Qt 排序接口（按列排序）"""
+        self.sort_groups(self.COLUMN_SORT_KEYS[column], order == Qt.DescendingOrder)
+
+    # ---- 数据装载 ----
+
+    def clear(self):
+        """清空结果"""
+        self.beginResetModel()
+        self._entries = []
+        self._row_of = {}
+        self._loaded = 0
+        self.endResetModel()
+
+    def add_groups(self, groups):
+        """加入一批新确认的重复组
+
+        已设置排序时整体重新排序（已有部分有序，代价接近线性），
+        因此应成批调用而不是每组调用一次。已装载的行不足一页时补足一页。
+        """
+        if not groups:
+            return
+        for group in groups:
+            self._row_of[id(group)] = len(self._entries)
+            self._entries.append((group, group.paths, group.reclaimable))
+        if self._sort_by is not None:
+            self._resort()
+        if self._loaded < self.PAGE_SIZE:
+            self.fetchMore()
+
+    # ---- 排序 ----
+
+    def sort_groups(self, sort_by, descending=False):
+        """按扫描结果中的数据重新排序组（不访问文件系统）
+
+        Args:
+            sort_by: name, path, size, wasted, hash
+            descending: 是否降序
+        """
+        self._sort_by = sort_by
+        self._descending = descending
+        self._resort()
+
+    def _resort(self):
+        """按当前排序方式重排，并让选中、展开等持久索引跟随组移动"""
+        if not self._entries:
+            return
+        self.layoutAboutToBeChanged.emit()
+        old_entries = self._entries
+        key = self._sort_key()
+        self._entries = sorted(old_entries, key=key, reverse=self._descending)
+        self._row_of = {id(entry[0]): row for row, entry in enumerate(self._entries)}
+
+        # 子行索引以所属组定位，行号不变；顶层行换算新行号。
+        # 所属组移出已装载范围的索引失效
+        old_indexes = self.persistentIndexList()
+        new_indexes = []
+        for index in old_indexes:
+            group = index.internalPointer()
+            if group is None:
+                group = old_entries[index.row()][0]
+                new_row = self._row_of[id(group)]
+                new_index = self.createIndex(new_row, index.column(), None)
+            else:
+                new_row = self._row_of[id(group)]
+                new_index = index
+            new_indexes.append(new_index if new_row < self._loaded else QModelIndex())
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+    def _sort_key(self):
+        if self._sort_by == 'wasted':
+            return lambda entry: (entry[2], entry[0].size)
+        if self._sort_by == 'size':
+            return lambda entry: (entry[0].size, entry[2])
+        if self._sort_by == 'path':
+            return lambda entry: entry[1][0].lower()
+        if self._sort_by == 'hash':
+            return lambda entry: entry[0].hash_value
+        return lambda entry: os.path.basename(entry[1][0]).lower()
+
+    # ---- 行数据访问 ----
+
+    def path_at(self, index):
+        """返回子行对应的文件路径，组行返回 None"""
+        if not index.isValid():
+            return None
+        group = index.internalPointer()
+        if group is None:
+            return None
+        return self._entries[self._row_of[id(group)]][1][index.row()]
+
+    def group_at(self, index):
+        """返回行所属的 DuplicateGroup"""
+        if not index.isValid():
+            return None
+        group = index.internalPointer()
+        if group is None:
+            return self._entries[index.row()][0]
+        return group
+
+    def group_count(self):
+        return len(self._entries)
+
+    # ---- 格式化 ----
+
+    @staticmethod
+    def format_size(size):
+        """格式化文件大小"""
+        for unit in ['B', 'KB', 'MB', 'GB']:
+            if size < 1024:
+                return f"{size:.2f} {unit}"
+            size /= 1024
+        return f"{size:.2f} TB"
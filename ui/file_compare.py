@@ -4,9 +4,17 @@
 """
 
 import os
-import hashlib
+import random
 from datetime import datetime
 from pathlib import Path
+from services.hash_service import HashService
+
+# 逐字节对比时每次从两个文件各读取的字节数
+COMPARE_CHUNK_SIZE = 1024 * 1024
+
+# 大小相同的文件先在开头、结尾和若干随机位置各取一块对比
+COMPARE_SAMPLE_SIZE = 64 * 1024
+COMPARE_RANDOM_SAMPLES = 4
 
 
 class FileComparer:
@@ -69,11 +77,9 @@ class FileComparer:
                 'description': f"修改时间不同: {file1_info['modified_str']} vs {file2_info['modified_str']}"
             })
         
-        # 3. 比较哈希值（内容）
-        hash1 = FileComparer._get_file_hash(file1_path)
-        hash2 = FileComparer._get_file_hash(file2_path)
-        
-        if hash1 != hash2:
+        # 3. 比较内容
+        if not FileComparer._contents_equal(file1_path, file2_path,
+                                            file1_info['size'], file2_info['size']):
             differences.append({
                 'type': 'content',
                 'description': '文件内容不同'
@@ -93,6 +99,49 @@ class FileComparer:
         
         return result
     
+    @staticmethod
+    def _contents_equal(file1_path, file2_path, size1, size2):
+        """分级判断两个文件内容是否相同
+        
+        1. 大小不同：内容必然不同，不读取文件
+        2. 同一个文件（硬链接等）：必然相同
+        3. 两个文件都有同一算法的缓存哈希值时直接比较，不读取文件
+        4. 对比开头、结尾和随机位置的取样块，多数不同的文件在此结束
+        5. 取样都相同时按块流式对比全部内容，遇到第一个不同处即停止
+        """
+        if size1 != size2:
+            return False
+        try:
+            if os.path.samefile(file1_path, file2_path):
+                return True
+            cached = FileComparer._cached_hashes_equal(file1_path, file2_path)
+            if cached is not None:
+                return cached
+            if size1 > COMPARE_SAMPLE_SIZE * (COMPARE_RANDOM_SAMPLES + 2):
+                if not FileComparer._samples_equal(file1_path, file2_path, size1):
+                    return False
+        except OSError:
+            return False
+        return FileComparer.compare_by_content(file1_path, file2_path)['are_identical']
+    
+    @staticmethod
+    def _samples_equal(file1_path, file2_path, size):
+        """对比两个同样大小的文件在开头、结尾和随机位置的取样块
+        
+        随机位置以文件大小为种子，同一对文件重复对比时取样位置不变。
+        """
+        rng = random.Random(size)
+        offsets = [0, size - COMPARE_SAMPLE_SIZE]
+        offsets += sorted(rng.randrange(COMPARE_SAMPLE_SIZE, size - 2 * COMPARE_SAMPLE_SIZE)
+                          for _ in range(COMPARE_RANDOM_SAMPLES))
+        with open(file1_path, 'rb', buffering=0) as f1, open(file2_path, 'rb', buffering=0) as f2:
+            for offset in offsets:
+                f1.seek(offset)
+                f2.seek(offset)
+                if f1.read(COMPARE_SAMPLE_SIZE) != f2.read(COMPARE_SAMPLE_SIZE):
+                    return False
+        return True
+    
     @staticmethod
     def _get_file_info(file_path):
         """获取文件信息"""
@@ -118,19 +167,25 @@ class FileComparer:
             }
     
     @staticmethod
-    def _get_file_hash(file_path, block_size=8192):
-        """计算文件哈希值"""
-        hasher = hashlib.md5()
-        try:
-            with open(file_path, 'rb') as f:
-                while True:
-                    block = f.read(block_size)
-                    if not block:
-                        break
-                    hasher.update(block)
-            return hasher.hexdigest()
-        except Exception as e:
-            return f"Error: {str(e)}"
+    def _cached_hashes_equal(file1_path, file2_path):
+        """按哈希缓存判断内容是否相同（只查缓存，不计算）
+        
+        取两个文件在缓存中共有的算法比较：任何一项（包括取样哈希、
+        指纹）不同即内容不同；完整摘要相同即内容相同。
+        
+        Returns:
+            bool 或 None: 缓存不足以判断时返回 None
+        """
+        hashes1 = HashService.get_cached_hashes(file1_path)
+        if not hashes1:
+            return None
+        hashes2 = HashService.get_cached_hashes(file2_path)
+        common = hashes1.keys() & hashes2.keys()
+        if any(hashes1[key] != hashes2[key] for key in common):
+            return False
+        if any(':' not in key for key in common):
+            return True
+        return None
     
     @staticmethod
     def _is_text_file(file_path):
@@ -208,53 +263,76 @@ class FileComparer:
         }
     
     @staticmethod
-    def compare_by_content(file1_path, file2_path):
+    def compare_by_content(file1_path, file2_path, count_differences=False,
+                           chunk_size=COMPARE_CHUNK_SIZE):
         """
         详细的内容对比（逐字节比较）
         
+        两个文件按块同步读取，整块相同时由一次 memcmp 确认，
+        只有不同的块才定位具体字节；默认在找到第一个不同处后停止读取。
+        count_differences 为 True 时读完公共长度，统计不同的字节数
+        （按块异或后计数，不逐字节循环）。
+        
         Returns:
-            dict: 对比结果
+            dict: 对比结果，未统计时 difference_count 为 None
         """
+        first_diff_pos = -1
+        difference_count = 0
+        offset = 0
         try:
-            with open(file1_path, 'rb') as f:
-                content1 = f.read()
-        except:
-            content1 = b''
-        
-        try:
-            with open(file2_path, 'rb') as f:
-                content2 = f.read()
-        except:
-            content2 = b''
+            size1 = os.path.getsize(file1_path)
+            size2 = os.path.getsize(file2_path)
+            with open(file1_path, 'rb') as f1, open(file2_path, 'rb') as f2:
+                while True:
+                    chunk1 = f1.read(chunk_size)
+                    chunk2 = f2.read(chunk_size)
+                    if chunk1 != chunk2:
+                        common = min(len(chunk1), len(chunk2))
+                        if first_diff_pos < 0:
+                            first_diff_pos = offset + _first_difference(chunk1, chunk2)
+                            if not count_differences:
+                                break
+                        difference_count += _count_differences(chunk1[:common], chunk2[:common])
+                    if len(chunk1) < chunk_size or len(chunk2) < chunk_size:
+                        break
+                    offset += chunk_size
+        except OSError as e:
+            return {
+                'are_identical': False,
+                'description': f'无法读取文件: {e}'
+            }
         
-        if content1 == content2:
+        if first_diff_pos < 0:
             return {
                 'are_identical': True,
                 'description': '文件内容完全相同'
             }
         
-        # 查找第一个不同的位置
-        min_len = min(len(content1), len(content2))
-        first_diff_pos = -1
-        
-        for i in range(min_len):
-            if content1[i] != content2[i]:
-                first_diff_pos = i
-                break
-        
-        if first_diff_pos == -1 and len(content1) != len(content2):
-            first_diff_pos = min_len
-        
         return {
             'are_identical': False,
-            'size1': len(content1),
-            'size2': len(content2),
+            'size1': size1,
+            'size2': size2,
             'first_diff_pos': first_diff_pos,
-            'difference_count': sum(1 for i in range(min_len) if content1[i] != content2[i]),
+            'difference_count': difference_count if count_differences else None,
             'description': f'文件在第{first_diff_pos}字节处出现不同'
         }
 
 
+def _first_difference(data1, data2):
+    """返回两段数据第一个不同字节的位置（一段是另一段的前缀时为较短的长度）"""
+    common = min(len(data1), len(data2))
+    if data1[:common] == data2[:common]:
+        return common
+    xor = int.from_bytes(data1[:common], 'big') ^ int.from_bytes(data2[:common], 'big')
+    return common - 1 - (xor.bit_length() - 1) // 8
+
+
+def _count_differences(data1, data2):
+    """统计两段等长数据中不同的字节数"""
+    xor = int.from_bytes(data1, 'big') ^ int.from_bytes(data2, 'big')
+    return len(data1) - xor.to_bytes(len(data1), 'big').count(0)
+
+
 def find_same_named_files(dir1, dir2):
     """
     查找两个目录中的同名文件
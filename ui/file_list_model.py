@@ -0,0 +1,481 @@
+"""
+文件列表数据模型 - 基于 QAbstractTableModel 的虚拟化文件列表
+"""
+
+import os
+from array import array
+from datetime import datetime
+from itertools import compress
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant
+from PyQt5.QtGui import QFont
+
+
+class FileListModel(QAbstractTableModel):
+    """文件列表模型
+
+    条目按列存放在紧凑数组中（名称列表 + 类型/大小/时间数组），
+    单元格文本只在视图绘制可见行时才生成，不为每一行创建 Qt 对象。
+    显示顺序由行号到条目下标的映射数组决定，排序和过滤只重排该映射，
+    使用加载时缓存的名称、大小和时间，不访问文件系统。
+    目录变化可通过 apply_changes 增量应用，只插入/删除受影响的行。
+    """
+
+    COLUMNS = ["名称", "类型", "大小", "修改时间"]
+    COLUMN_SORT_KEYS = ['name', 'type', 'size', 'date']
+
+    # 单次变化超过该数量时整体重排，而不是逐行插入/删除
+    BULK_CHANGE_THRESHOLD = 200
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._names = []
+        self._lower_names = []  # 过滤用小写名称
+        self._is_dir = bytearray()
+        self._sizes = array('q')   # 目录及上级目录为 -1
+        self._mtimes = array('d')  # 上级目录为 -1
+        self._order = array('l')  # 全部条目下标（已排序）
+        self._rows = array('l')  # 显示行 -> 条目下标（过滤后）
+        self._order_lower = None  # 与 _order 对齐的小写名称（按需生成）
+        self._rows_lower = None  # 与 _rows 对齐的小写名称（按需生成）
+        self._sort_by = 'name'  # name, size, date, type
+        self._descending = False
+        self._filter = None  # PatternMatcher，None 表示不过滤
+        self._name_index = None  # 名称 -> 条目下标（增量更新时按需生成）
+        self._bold_font = QFont()
+        self._bold_font.setBold(True)
+
+    # ---- Qt 模型接口 ----
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+        row = self._rows[index.row()]
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return self._names[row]
+            if column == 1:
+                return "文件夹" if self._is_dir[row] else "文件"
+            if column == 2:
+                size = self._sizes[row]
+                return '-' if size < 0 else self.format_size(size)
+            if column == 3:
+                return self.format_time(self._mtimes[row])
+        elif role == Qt.FontRole:
+            if column == 0 and self._is_dir[row]:
+                return self._bold_font
+        return QVariant()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Qt 排序接口（按列排序）"""
+        self.sort_entries(self.COLUMN_SORT_KEYS[column], order == Qt.DescendingOrder)
+
+    # ---- 数据装载 ----
+
+    def set_entries(self, entries):
+        """替换全部条目并按当前排序方式排列
+
+        Args:
+            entries: [(name, is_dir, size, mtime), ...]，size/mtime 为 None 表示不显示
+        """
+        self.beginResetModel()
+        self._names = []
+        self._lower_names = []
+        self._is_dir = bytearray()
+        self._sizes = array('q')
+        self._mtimes = array('d')
+        self._append(entries)
+        self._order = self._sorted_rows(range(len(self._names)))
+        self._order_lower = None
+        self._name_index = None
+        self._rows, self._rows_lower = self._filtered_rows(self._order)
+        self.endResetModel()
+
+    def append_entries(self, entries):
+        """在末尾追加条目（用于分批加载）"""
+        first_entry = len(self._names)
+        self._append(entries)
+        new_entries = range(first_entry, len(self._names))
+        self._order.extend(new_entries)
+        self._order_lower = None
+        if self._name_index is not None:
+            for i in new_entries:
+                self._name_index[self._names[i]] = i
+        new_rows, _ = self._filtered_rows(new_entries)
+        if not new_rows:
+            return
+        first_row = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first_row, first_row + len(new_rows) - 1)
+        self._rows.extend(new_rows)
+        self._rows_lower = None
+        self.endInsertRows()
+
+    def clear(self):
+        """清空模型"""
+        self.set_entries([])
+
+    def _append(self, entries):
+        names = self._names
+        lower_names = self._lower_names
+        is_dir = self._is_dir
+        sizes = self._sizes
+        mtimes = self._mtimes
+        for name, entry_is_dir, size, mtime in entries:
+            names.append(name)
+            lower_names.append(name.lower())
+            is_dir.append(1 if entry_is_dir else 0)
+            sizes.append(-1 if size is None or entry_is_dir else size)
+            mtimes.append(-1 if mtime is None else mtime)
+
+    # ---- 排序 ----
+
+    def sort_entries(self, sort_by, descending=False):
+        """按缓存数据重新排序（不访问文件系统）
+
+        Args:
+            sort_by: name, size, date, type
+            descending: 是否降序
+        """
+        self._sort_by = sort_by
+        self._descending = descending
+        self._order = self._sorted_rows(self._order)
+        self._order_lower = None
+        if self._filter is None:
+            self._relayout(array('l', self._order))
+        else:
+            self._relayout(self._sorted_rows(self._rows))
+
+    def _sort_key(self):
+        names = self._names
+        if self._sort_by == 'size':
+            sizes = self._sizes
+            # 目录返回0，文件返回实际大小
+            return lambda i: max(sizes[i], 0)
+        if self._sort_by == 'date':
+            mtimes = self._mtimes
+            return lambda i: mtimes[i]
+        if self._sort_by == 'type':
+            is_dir = self._is_dir
+
+            # 按扩展名排序，目录扩展名视为空
+            def type_key(i):
+                name = names[i].lower()
+                if is_dir[i]:
+                    return ('', name)
+                return (os.path.splitext(name)[1], name)
+            return type_key
+        return lambda i: names[i].lower()
+
+    def _sorted_rows(self, rows):
+        """排序条目下标：上级目录 + 目录 + 文件"""
+        names = self._names
+        is_dir = self._is_dir
+        parent = [i for i in rows if is_dir[i] and names[i] == '..']
+        dirs = [i for i in rows if is_dir[i] and names[i] != '..']
+        files = [i for i in rows if not is_dir[i]]
+
+        key = self._sort_key()
+        dirs.sort(key=key, reverse=self._descending)
+        files.sort(key=key, reverse=self._descending)
+        return array('l', parent + dirs + files)
+
+    # ---- 过滤 ----
+
+    def set_filter(self, name_filter):
+        """设置名称过滤（在缓存条目上进行，不访问文件系统）
+
+        新条件的结果必然是上一次结果的子集时（如继续输入更长的模式），
+        只在上一次的结果中筛选。
+
+        Args:
+            name_filter: PatternMatcher，None 表示不过滤
+        """
+        previous = self._filter
+        self._filter = name_filter
+        if name_filter is not None and previous is not None and name_filter.narrows(previous):
+            if self._rows_lower is None:
+                self._rows_lower = self._lower_names_of(self._rows)
+            source, source_lower = self._rows, self._rows_lower
+        else:
+            if self._order_lower is None:
+                self._order_lower = self._lower_names_of(self._order)
+            source, source_lower = self._order, self._order_lower
+        self.beginResetModel()
+        self._rows, self._rows_lower = self._filtered_rows(source, source_lower)
+        self.endResetModel()
+
+    def _lower_names_of(self, source):
+        lower_names = self._lower_names
+        return list(map(lower_names.__getitem__, source))
+
+    def _filtered_rows(self, source, source_lower=None):
+        """按当前过滤条件筛选条目下标（上级目录始终保留）
+
+        Returns:
+            tuple: (条目下标数组, 对齐的小写名称列表或 None)
+        """
+        if self._filter is None or self._filter.kind == 'all':
+            return array('l', source), source_lower
+        if source_lower is None:
+            source_lower = self._lower_names_of(source)
+        keep = 1 if len(source) and self._names[source[0]] == '..' else 0
+        mask = list(self._filter.select(source_lower[keep:]))
+        rows = array('l', source[:keep])
+        rows.extend(compress(source[keep:], mask))
+        rows_lower = source_lower[:keep]
+        rows_lower.extend(compress(source_lower[keep:], mask))
+        return rows, rows_lower
+
+    # ---- 增量更新 ----
+
+    def apply_changes(self, upserts, removed):
+        """增量应用目录变化
+
+        Args:
+            upserts: [(name, is_dir, size, mtime), ...] 新增或发生变化的条目
+            removed: [name, ...] 已删除的条目名
+        """
+        if not upserts and not removed:
+            return
+        if len(upserts) + len(removed) > self.BULK_CHANGE_THRESHOLD:
+            self._apply_bulk_changes(upserts, removed)
+            return
+
+        index = self._get_name_index()
+        repositioned = self._sort_by in ('size', 'date')
+        updated = False
+
+        for name in removed:
+            i = index.pop(name, None)
+            if i is not None:
+                self._remove_entry(i)
+
+        for entry in upserts:
+            name, is_dir, size, mtime = entry
+            i = index.get(name)
+            if i is None:
+                self._append([entry])
+                i = len(self._names) - 1
+                index[name] = i
+                self._insert_entry(i)
+            elif not self._entry_differs(i, entry):
+                continue
+            elif repositioned or bool(self._is_dir[i]) != bool(is_dir):
+                # 排序位置可能变化：按旧值移除后再按新值插入
+                self._remove_entry(i)
+                self._set_values(i, entry)
+                self._insert_entry(i)
+            else:
+                self._set_values(i, entry)
+                updated = True
+
+        self._order_lower = None
+        self._rows_lower = None
+        if updated and self._rows:
+            self.dataChanged.emit(self.index(0, 0),
+                                  self.index(len(self._rows) - 1, len(self.COLUMNS) - 1))
+
+    def sync_entries(self, entries):
+        """与一份完整的目录列表对齐（只应用差异，保留选中状态）"""
+        index = self._get_name_index()
+        current = dict(index)
+        upserts = []
+        for entry in entries:
+            i = current.pop(entry[0], None)
+            if i is None or self._entry_differs(i, entry):
+                upserts.append(entry)
+        current.pop('..', None)
+        self.apply_changes(upserts, list(current))
+
+    def _apply_bulk_changes(self, upserts, removed):
+        """大量变化：修改数据后整体重新排序和过滤"""
+        self.beginResetModel()
+        index = self._get_name_index()
+        dead = set()
+        for name in removed:
+            i = index.pop(name, None)
+            if i is not None:
+                dead.add(i)
+        order = [i for i in self._order if i not in dead] if dead else list(self._order)
+        for entry in upserts:
+            i = index.get(entry[0])
+            if i is None:
+                self._append([entry])
+                i = len(self._names) - 1
+                index[entry[0]] = i
+                order.append(i)
+            else:
+                self._set_values(i, entry)
+        self._order = self._sorted_rows(order)
+        if len(self._names) > 2 * len(self._order) + 1024:
+            self._compact()
+        self._order_lower = None
+        self._rows, self._rows_lower = self._filtered_rows(self._order)
+        self.endResetModel()
+
+    def _compact(self):
+        """丢弃已删除条目占用的空间（需在模型重置期间调用）"""
+        order = self._order
+        self._names = [self._names[i] for i in order]
+        self._lower_names = [self._lower_names[i] for i in order]
+        self._is_dir = bytearray(self._is_dir[i] for i in order)
+        self._sizes = array('q', (self._sizes[i] for i in order))
+        self._mtimes = array('d', (self._mtimes[i] for i in order))
+        self._order = array('l', range(len(order)))
+        self._name_index = None
+
+    def _get_name_index(self):
+        if self._name_index is None:
+            names = self._names
+            self._name_index = {names[i]: i for i in self._order}
+        return self._name_index
+
+    def _entry_differs(self, i, entry):
+        _, is_dir, size, mtime = entry
+        if bool(self._is_dir[i]) != bool(is_dir):
+            return True
+        if not is_dir and self._sizes[i] != size:
+            return True
+        return self._mtimes[i] != (-1 if mtime is None else mtime)
+
+    def _set_values(self, i, entry):
+        _, is_dir, size, mtime = entry
+        self._is_dir[i] = 1 if is_dir else 0
+        self._sizes[i] = -1 if size is None or is_dir else size
+        self._mtimes[i] = -1 if mtime is None else mtime
+
+    def _remove_entry(self, i):
+        """从排序序列和显示行中移除条目"""
+        pos = self._locate(self._order, i)
+        if pos is not None:
+            del self._order[pos]
+        row = self._locate(self._rows, i)
+        if row is not None:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._rows[row]
+            self.endRemoveRows()
+
+    def _insert_entry(self, i):
+        """按当前排序把条目插入排序序列，通过过滤时插入显示行"""
+        key = self._position_key(i)
+        self._order.insert(self._bisect(self._order, key, right=True), i)
+        if self._passes_filter(i):
+            row = self._bisect(self._rows, key, right=True)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._rows.insert(row, i)
+            self.endInsertRows()
+
+    def _passes_filter(self, i):
+        if self._filter is None or self._filter.kind == 'all' or self._names[i] == '..':
+            return True
+        return bool(next(iter(self._filter.select([self._lower_names[i]]))))
+
+    def _position_key(self, i):
+        """(分区, 排序键)：上级目录 0、目录 1、文件 2，与 _sorted_rows 一致"""
+        if self._is_dir[i]:
+            section = 0 if self._names[i] == '..' else 1
+        else:
+            section = 2
+        return (section, self._sort_key()(i))
+
+    def _before(self, key_a, key_b):
+        """在当前排序下 key_a 是否严格排在 key_b 之前"""
+        if key_a[0] != key_b[0]:
+            return key_a[0] < key_b[0]
+        if self._descending:
+            return key_a[1] > key_b[1]
+        return key_a[1] < key_b[1]
+
+    def _bisect(self, seq, key, right=False):
+        """在已排序的下标序列中二分查找 key 的插入位置"""
+        lo, hi = 0, len(seq)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_key = self._position_key(seq[mid])
+            if self._before(key, mid_key) if right else not self._before(mid_key, key):
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def _locate(self, seq, i):
+        """查找条目在已排序序列中的位置，不存在时返回 None"""
+        key = self._position_key(i)
+        lo = self._bisect(seq, key)
+        hi = self._bisect(seq, key, right=True)
+        for pos in range(lo, hi):
+            if seq[pos] == i:
+                return pos
+        return None
+
+    def _relayout(self, new_rows):
+        """替换显示顺序，并让选中项等持久索引跟随条目移动"""
+        self.layoutAboutToBeChanged.emit()
+        old_rows = self._rows
+        self._rows = new_rows
+        self._rows_lower = None
+        entry_to_row = {entry: row for row, entry in enumerate(new_rows)}
+        old_indexes = self.persistentIndexList()
+        new_indexes = []
+        for index in old_indexes:
+            new_row = entry_to_row.get(old_rows[index.row()])
+            if new_row is None:
+                new_indexes.append(QModelIndex())
+            else:
+                new_indexes.append(self.index(new_row, index.column()))
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+    # ---- 行数据访问 ----
+
+    def name_at(self, row):
+        return self._names[self._rows[row]]
+
+    def is_dir_at(self, row):
+        return bool(self._is_dir[self._rows[row]])
+
+    def size_at(self, row):
+        """返回文件大小，目录返回 0"""
+        return max(self._sizes[self._rows[row]], 0)
+
+    def mtime_at(self, row):
+        """返回修改时间戳，未知时返回 None"""
+        mtime = self._mtimes[self._rows[row]]
+        return None if mtime < 0 else mtime
+
+    # ---- 格式化 ----
+
+    @staticmethod
+    def format_size(size):
+        """格式化文件大小"""
+        for unit in ['B', 'KB', 'MB', 'GB']:
+            if size < 1024:
+                return f"{size:.2f} {unit}"
+            size /= 1024
+        return f"{size:.2f} TB"
+
+    @staticmethod
+    def format_time(timestamp):
+        """格式化修改时间"""
+        if timestamp is None or timestamp < 0:
+            return '-'
+        try:
+            return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+        except (OverflowError, OSError, ValueError):
+            return '-'
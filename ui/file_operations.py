@@ -6,6 +6,7 @@ import os
 import shutil
 import subprocess
 from pathlib import Path
+from services.dir_walker import walk_parallel
 
 
 class FileOperationManager:
@@ -69,15 +70,14 @@ class FileOperationManager:
     
     @staticmethod
     def get_folder_size(folder_path):
-        """获取文件夹大小"""
+        """获取文件夹大小（并行遍历，stat 在遍历线程中完成）"""
         total_size = 0
         try:
-            for dirpath, dirnames, filenames in os.walk(folder_path):
-                for f in filenames:
-                    fp = os.path.join(dirpath, f)
+            for dirpath, dirs, files in walk_parallel(folder_path, stat_files=True):
+                for entry in files:
                     try:
-                        total_size += os.path.getsize(fp)
-                    except:
+                        total_size += entry.stat().st_size
+                    except OSError:
                         pass
         except:
             pass
@@ -3,22 +3,33 @@
 """
 
 import os
-import shutil
-import fnmatch
 import re
+import stat
+import shutil
+import threading
 from pathlib import Path
 from datetime import datetime
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QTableWidget, 
-    QTableWidgetItem, QMessageBox, QFileDialog, QHeaderView, QMenu, QPushButton,
+    QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QTableView,
+    QMessageBox, QFileDialog, QHeaderView, QMenu, QPushButton,
     QTreeView, QSplitter
 )
-from PyQt5.QtCore import Qt, QSize, QDir
-from PyQt5.QtGui import QIcon, QFont
+from PyQt5.QtCore import Qt, QDir, QTimer, pyqtSignal
 from PyQt5.QtWidgets import QFileSystemModel
+from .file_list_model import FileListModel
+from .dir_loader import DirectoryLoadWorker
+from services.listing_cache import get_listing_cache
+from services.fs_watcher import get_directory_watcher
+from services.pattern_matcher import get_matcher
 
 
 class FilePanel(QWidget):
+    # 监视线程发现当前目录变化（跨线程信号，在界面线程处理）
+    fs_changed = pyqtSignal()
+    
+    FS_COALESCE_MS = 250  # 合并目录变化事件的时间窗口
+    FS_RESYNC_THRESHOLD = 2000  # 一个窗口内变化超过该数量时改为后台重新读取
+    
     def __init__(self, panel_name="", initial_path=None, show_tree=False, filter_mode="wildcard", on_path_changed_callback=None):
         super().__init__()
         self.panel_name = panel_name
@@ -42,6 +53,27 @@ class FilePanel(QWidget):
         self.sort_order = 'asc' # asc, desc
         
         self.sePlected_files = []
+        
+        # 后台目录加载状态
+        self._load_worker = None
+        self._load_generation = 0
+        self._loaded_entries = []  # 当前加载已收到的原始条目
+        self._load_streaming = False  # 本次加载是否已开始向模型追加
+        self._load_resync = False  # 本次加载只与现有列表对齐差异
+        
+        # 目录实时监视状态（_fs_lock 保护监视线程写入的字段）
+        self._fs_lock = threading.Lock()
+        self._fs_pending = set()  # 待处理的变化条目名
+        self._fs_full_resync = False  # 需要重新读取整个目录
+        self._fs_notified = False  # 已发出 fs_changed 尚未处理
+        self._watched_path = None
+        self._fs_missed = True  # 未监视期间（创建后或隐藏时）可能有变化，显示时需要对齐
+        self._fs_timer = QTimer(self)
+        self._fs_timer.setSingleShot(True)
+        self._fs_timer.setInterval(self.FS_COALESCE_MS)
+        self._fs_timer.timeout.connect(self._apply_fs_changes)
+        self.fs_changed.connect(self._on_fs_changed)
+        
         self.setFocusPolicy(Qt.StrongFocus)  # 允许获得焦点
         
         # 主布局
@@ -92,6 +124,7 @@ class FilePanel(QWidget):
         self.filter_input = QLineEdit()
         self.filter_input.setPlaceholderText("过滤（支持通配符，例：*.txt；正则请切换模式）")
         self.filter_input.returnPressed.connect(self.apply_filter)
+        self.filter_input.textChanged.connect(self.apply_filter)  # 输入即过滤（内存中进行）
         filter_layout.addWidget(self.filter_input)
         
         clear_filter_btn = QPushButton("清除过滤")
@@ -125,27 +158,39 @@ class FilePanel(QWidget):
         self.dir_tree.setHeaderHidden(True)
         self.dir_tree.setVisible(self.show_tree_flag)
         
-        # 文件列表表格
-        self.file_list = QTableWidget()
-        self.file_list.setColumnCount(4)
-        self.file_list.setHorizontalHeaderLabels(["名称", "类型", "大小", "修改时间"])
+        # 文件列表（模型/视图，只绘制可见行）
+        self.file_model = FileListModel(self)
+        self.file_list = QTableView()
+        self.file_list.setModel(self.file_model)
+        self.file_list.setEditTriggers(QTableView.NoEditTriggers)
+        self.file_list.setWordWrap(False)
         self.file_list.horizontalHeader().setStretchLastSection(False)
+        # 固定列宽/行高，避免按内容计算尺寸时遍历所有行
         self.file_list.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
-        self.file_list.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
-        self.file_list.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeToContents)
-        self.file_list.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeToContents)
+        self.file_list.horizontalHeader().setSectionResizeMode(1, QHeaderView.Interactive)
+        self.file_list.horizontalHeader().setSectionResizeMode(2, QHeaderView.Interactive)
+        self.file_list.horizontalHeader().setSectionResizeMode(3, QHeaderView.Interactive)
+        self.file_list.setColumnWidth(1, 70)
+        self.file_list.setColumnWidth(2, 90)
+        self.file_list.setColumnWidth(3, 140)
+        self.file_list.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.file_list.verticalHeader().setDefaultSectionSize(24)
+        self.file_list.horizontalHeader().setSectionsClickable(True)
+        self.file_list.horizontalHeader().setSortIndicatorShown(True)
+        self.file_list.horizontalHeader().sectionClicked.connect(self.on_header_clicked)
+        self._update_sort_indicator()
         
         self.file_list.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: #FFFFFF;
                 border: 1px solid #D0D0D0;
                 border-radius: 3px;
                 gridline-color: #E8E8E8;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 2px 4px;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #0078d4;
                 color: white;
             }
@@ -158,9 +203,9 @@ class FilePanel(QWidget):
             }
         """)
         
-        self.file_list.setSelectionBehavior(QTableWidget.SelectRows)
-        self.file_list.setSelectionMode(QTableWidget.ExtendedSelection)
-        self.file_list.itemDoubleClicked.connect(self.on_item_double_clicked)
+        self.file_list.setSelectionBehavior(QTableView.SelectRows)
+        self.file_list.setSelectionMode(QTableView.ExtendedSelection)
+        self.file_list.doubleClicked.connect(self.on_item_double_clicked)
         self.file_list.setContextMenuPolicy(Qt.CustomContextMenu)
         self.file_list.customContextMenuRequested.connect(self.show_context_menu)
         self.file_list.selectionModel().selectionChanged.connect(self.update_status)
@@ -191,144 +236,257 @@ class FilePanel(QWidget):
         self.setLayout(layout)
         
         # 初始化文件列表
-        self.refresh()
+        self.refresh(use_cache=True)
     
-    def refresh(self):
-        """刷新文件列表"""
+    def refresh(self, use_cache=False):
+        """刷新文件列表
+        
+        Args:
+            use_cache: 是否允许使用共享的目录列表缓存（导航时使用；
+                       手动刷新和文件操作后为 False，强制重新读取）
+        """
         if not os.path.exists(self.current_path):
             QMessageBox.warning(self, "警告", "路径不存在")
             self.current_path = str(Path.home())
         
         self.path_input.setText(self.current_path)
-        self.load_directory(self.current_path)
+        self.load_directory(self.current_path, use_cache)
         self.update_status()
     
-    def load_directory(self, path):
-        """加载目录内容"""
-        try:
-            self.file_list.setRowCount(0)
-            items = []
-            
-            # 添加上级目录
-            if path != os.path.abspath(os.sep):
-                items.append({
-                    'name': '..',
-                    'path': os.path.dirname(path),
-                    'is_dir': True,
-                    'size': '-',
-                    'modified': '-'
-                })
-            
-            # 列出目录内容
-            for item in os.listdir(path):
-                item_path = os.path.join(path, item)
-                try:
-                    if os.path.isdir(item_path):
-                        items.append({
-                            'name': item,
-                            'path': item_path,
-                            'is_dir': True,
-                            'size': '-',
-                            'modified': self.get_modified_time(item_path)
-                        })
-                    else:
-                        size = os.path.getsize(item_path)
-                        size_str = self.format_size(size)
-                        items.append({
-                            'name': item,
-                            'path': item_path,
-                            'is_dir': False,
-                            'size': size_str,
-                            'modified': self.get_modified_time(item_path)
-                        })
-                except (OSError, IOError):
-                    continue
-            
-            # 排序：目录优先，然后按配置的排序方式排序
-            items = self._sort_items(items)
-            
-            # 过滤
-            filtered_items = []
-            for item in items:
-                if self._match_filter(item['name']):
-                    filtered_items.append(item)
-            
-            # 填充表格
-            for item in filtered_items:
-                row = self.file_list.rowCount()
-                self.file_list.insertRow(row)
-                
-                # 名称
-                name_item = QTableWidgetItem(item['name'])
-                if item['is_dir']:
-                    font = QFont()
-                    font.setBold(True)
-                    name_item.setFont(font)
-                self.file_list.setItem(row, 0, name_item)
-                
-                # 类型
-                type_item = QTableWidgetItem("文件夹" if item['is_dir'] else "文件")
-                self.file_list.setItem(row, 1, type_item)
-                
-                # 大小
-                size_item = QTableWidgetItem(item['size'])
-                self.file_list.setItem(row, 2, size_item)
-                
-                # 修改时间
-                time_item = QTableWidgetItem(item['modified'])
-                self.file_list.setItem(row, 3, time_item)
-        
-        except PermissionError:
-            # 静默跳过无权限目录，不弹对话框，行为类似 FreeCommander
-            # 保持当前路径不变，文件列表保持上一次可访问状态
+    def load_directory(self, path, use_cache=True, resync=False):
+        """加载目录内容（后台线程枚举，分批显示）
+        
+        Args:
+            path: 目录路径
+            use_cache: 是否允许使用共享的目录列表缓存
+            resync: 为 True 时不替换列表，只把读取结果与当前列表的差异应用到模型
+        """
+        self._cancel_load()
+        self._load_generation += 1
+        self._loaded_entries = []
+        self._load_streaming = False
+        self._load_resync = resync
+        
+        # 先开始监视再读取，读取期间发生的变化会在加载完成后补上
+        if self.isVisible():
+            self._watch_directory(path)
+        
+        cache = get_listing_cache()
+        if use_cache:
+            # 受监视且未失效的缓存无需任何 I/O，直接显示；没有目录监视器的
+            # 平台（Windows、macOS）上用一次 stat 按目录 mtime 校验
+            cached = cache.get(path, validate=get_directory_watcher() is None)
+            if cached is not None:
+                self._show_entries(cached)
+                return
+        else:
+            cache.invalidate(path)
+        
+        worker = DirectoryLoadWorker(path, self._load_generation)
+        worker.batch_ready.connect(self._on_load_batch)
+        worker.permission_denied.connect(self._on_load_permission_denied)
+        worker.error.connect(self._on_load_error)
+        self._load_worker = worker
+        worker.start()
+    
+    def _cancel_load(self):
+        """取消正在进行的目录加载"""
+        if self._load_worker is not None:
+            self._load_worker.cancel()
+            self._load_worker = None
+    
+    def _on_load_batch(self, generation, entries, is_last):
+        """接收后台加载的一批条目"""
+        if generation != self._load_generation:
+            return  # 已导航到其他目录
+        self._loaded_entries.extend(entries)
+        
+        if is_last:
+            # 加载完成：完整排序后一次性替换
+            self._load_worker = None
+            self._show_entries(self._loaded_entries)
+        elif self._load_resync:
+            return  # 对齐模式只使用完整结果
+        elif not self._load_streaming:
+            # 首批：立即替换旧列表，让首屏尽快出现
+            self._load_streaming = True
+            self.file_model.set_entries(self._parent_entry() + entries)
+        else:
+            self.file_model.append_entries(entries)
+        self.update_status()
+    
+    def _on_load_permission_denied(self, generation):
+        """无权限目录"""
+        if generation != self._load_generation:
             return
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"加载目录失败: {str(e)}")
-    
-    def _sort_items(self, items):
-        """排序文件列表"""
-        # 目录优先
-        dirs = [item for item in items if item.get('is_dir', False) and item['name'] != '..']
-        files = [item for item in items if not item.get('is_dir', False)]
-        parent = [item for item in items if item.get('is_dir', False) and item['name'] == '..']
-        
-        # 对目录和文件分别排序
-        def sort_key(item):
-            if self.sort_by == 'name':
-                return item['name'].lower()
-            elif self.sort_by == 'size':
-                # 目录返回0，文件返回实际大小
-                if item.get('is_dir', False):
-                    return 0
-                try:
-                    return os.path.getsize(item['path'])
-                except:
-                    return 0
-            elif self.sort_by == 'date':
-                # 使用修改时间
+        # 静默跳过无权限目录，不弹对话框，行为类似 FreeCommander
+        # 保持当前路径不变，文件列表保持上一次可访问状态
+        self._load_worker = None
+        self._resume_fs_changes()
+    
+    def _on_load_error(self, generation, message):
+        """加载失败"""
+        if generation != self._load_generation:
+            return
+        self._load_worker = None
+        self._resume_fs_changes()
+        QMessageBox.critical(self, "错误", f"加载目录失败: {message}")
+    
+    def _parent_entry(self):
+        """上级目录条目"""
+        if self.current_path != os.path.abspath(os.sep):
+            return [('..', True, None, None)]
+        return []
+    
+    def _show_entries(self, entries):
+        """显示完整的目录条目（排序和过滤由模型按缓存数据完成）"""
+        if self._load_resync:
+            self.file_model.sync_entries(entries)
+        else:
+            self.file_model.set_entries(self._parent_entry() + list(entries))
+        if self._fs_pending or self._fs_full_resync:
+            self._fs_timer.start()
+    
+    # ---- 目录实时监视 ----
+    
+    def showEvent(self, event):
+        """面板可见时开始监视当前目录"""
+        super().showEvent(event)
+        if self._watched_path != self.current_path:
+            self._watch_directory(self.current_path)
+        if self._fs_missed:
+            self._fs_missed = False
+            self._resync()
+    
+    def hideEvent(self, event):
+        """面板隐藏（如切换到其他标签）时停止监视"""
+        super().hideEvent(event)
+        if self._watched_path is not None:
+            self._unwatch_directory()
+            self._fs_missed = True
+    
+    def _watch_directory(self, path):
+        """改为监视指定目录"""
+        if self._watched_path == path:
+            return
+        self._unwatch_directory()
+        watcher = get_directory_watcher()
+        if watcher is not None and watcher.watch(path, self._on_fs_event):
+            self._watched_path = path
+    
+    def _unwatch_directory(self):
+        """停止监视并丢弃未处理的变化"""
+        watcher = get_directory_watcher()
+        if watcher is not None and self._watched_path is not None:
+            watcher.unwatch(self._watched_path, self._on_fs_event)
+        self._fs_timer.stop()
+        with self._fs_lock:
+            self._watched_path = None
+            self._fs_pending.clear()
+            self._fs_full_resync = False
+            self._fs_notified = False
+    
+    def _on_fs_event(self, path, name):
+        """监视线程回调：记录变化，只在首个未处理事件时通知界面线程"""
+        with self._fs_lock:
+            if path != self._watched_path:
+                return
+            if name is None:
+                self._fs_full_resync = True
+            else:
+                self._fs_pending.add(name)
+            if self._fs_notified:
+                return
+            self._fs_notified = True
+        self.fs_changed.emit()
+    
+    def _on_fs_changed(self):
+        """开始合并窗口：窗口内的后续事件在到期时一并处理"""
+        if not self._fs_timer.isActive():
+            self._fs_timer.start()
+    
+    def _resume_fs_changes(self):
+        """加载结束（含失败）后恢复实时更新
+
+        加载期间 _apply_fs_changes 不处理变化，_fs_notified 保持为 True；
+        这里将其复位，使之后的事件重新发出 fs_changed，并处理积压的变化。
+        """
+        with self._fs_lock:
+            self._fs_notified = False
+            pending = bool(self._fs_pending) or self._fs_full_resync
+        if pending:
+            self._fs_timer.start()
+    
+    def _apply_fs_changes(self):
+        """把合并后的变化增量应用到文件列表"""
+        if self._load_worker is not None:
+            # 加载尚未完成，列表还不完整，加载完成后再处理
+            return
+        with self._fs_lock:
+            names = self._fs_pending
+            full_resync = self._fs_full_resync
+            self._fs_pending = set()
+            self._fs_full_resync = False
+            self._fs_notified = False
+        
+        if full_resync or len(names) > self.FS_RESYNC_THRESHOLD:
+            self._resync()
+            return
+        
+        upserts = []
+        removed = []
+        for name in names:
+            item_path = os.path.join(self.current_path, name)
+            try:
                 try:
-                    return os.path.getmtime(item['path'])
-                except:
-                    return 0
-            elif self.sort_by == 'type':
-                # 按扩展名排序
-                if item.get('is_dir', False):
-                    return ('', item['name'].lower())
-                ext = os.path.splitext(item['name'])[1].lower()
-                return (ext, item['name'].lower())
-            return item['name'].lower()
-        
-        dirs.sort(key=sort_key, reverse=(self.sort_order == 'desc'))
-        files.sort(key=sort_key, reverse=(self.sort_order == 'desc'))
-        
-        # 合并：父目录 + 目录 + 文件
-        return parent + dirs + files
+                    st = os.stat(item_path)
+                except OSError:
+                    st = os.lstat(item_path)  # 失效的符号链接
+            except OSError:
+                removed.append(name)
+                continue
+            is_dir = stat.S_ISDIR(st.st_mode)
+            upserts.append((name, is_dir, 0 if is_dir else st.st_size, st.st_mtime))
+        
+        self.file_model.apply_changes(upserts, removed)
+        self.update_status()
+    
+    def _resync(self):
+        """重新读取当前目录，只把差异应用到列表"""
+        if self._load_worker is not None:
+            return  # 正在进行的加载本身就会得到最新列表
+        path = self.current_path
+        if not os.path.isdir(path):
+            # 当前目录已被删除或移走：退到最近的存在的上级目录
+            parent = os.path.dirname(path)
+            while parent != path and not os.path.isdir(parent):
+                path, parent = parent, os.path.dirname(parent)
+            if os.path.isdir(parent):
+                self.change_path(parent)
+            return
+        self.load_directory(path, use_cache=True, resync=True)
     
     def set_sort(self, sort_by, sort_order='asc'):
-        """设置排序方式"""
+        """设置排序方式（在内存中重排，不重新读取目录）"""
         self.sort_by = sort_by
         self.sort_order = sort_order
-        self.refresh()
+        self.file_model.sort_entries(sort_by, sort_order == 'desc')
+        self._update_sort_indicator()
+    
+    def on_header_clicked(self, column):
+        """点击表头排序：同一列切换升降序，新列从升序开始"""
+        sort_by = FileListModel.COLUMN_SORT_KEYS[column]
+        if sort_by == self.sort_by:
+            sort_order = 'desc' if self.sort_order == 'asc' else 'asc'
+        else:
+            sort_order = 'asc'
+        self.set_sort(sort_by, sort_order)
+    
+    def _update_sort_indicator(self):
+        """同步表头排序指示箭头"""
+        column = FileListModel.COLUMN_SORT_KEYS.index(self.sort_by)
+        order = Qt.DescendingOrder if self.sort_order == 'desc' else Qt.AscendingOrder
+        self.file_list.horizontalHeader().setSortIndicator(column, order)
     
     @staticmethod
     def format_size(size):
@@ -351,41 +509,26 @@ class FilePanel(QWidget):
     def update_status(self):
         """更新状态栏"""
         try:
-            total_items = self.file_list.rowCount()
-            selected = len(self.file_list.selectedIndexes()) // 4 if self.file_list.selectedIndexes() else 0
-            
-            # 计算选中文件的总大小
-            total_size = 0
-            for index in self.file_list.selectedIndexes():
-                row = index.row()
-                size_text = self.file_list.item(row, 2).text()
-                if size_text and size_text != '-':
-                    try:
-                        size_parts = size_text.split()
-                        size_val = float(size_parts[0])
-                        unit = size_parts[1] if len(size_parts) > 1 else 'B'
-                        multipliers = {'B': 1, 'KB': 1024, 'MB': 1024**2, 'GB': 1024**3}
-                        total_size += size_val * multipliers.get(unit, 1)
-                    except:
-                        pass
+            total_items = self.file_model.rowCount()
+            rows = self._selected_rows()
+            total_size = sum(self.file_model.size_at(row) for row in rows)
             
-            status_text = f"总项: {total_items} | 选中: {selected} | 大小: {self.format_size(total_size)}"
+            status_text = f"总项: {total_items} | 选中: {len(rows)} | 大小: {self.format_size(total_size)}"
             self.status_label.setText(status_text)
         except:
             self.status_label.setText("就绪")
     
-    def on_item_double_clicked(self, item):
+    def _selected_rows(self):
+        """获取选中的行号（按行号排序）"""
+        return sorted(index.row() for index in self.file_list.selectionModel().selectedRows())
+    
+    def on_item_double_clicked(self, index):
         """双击打开"""
         try:
-            if item is None:
+            if index is None or not index.isValid():
                 return
             
-            row = item.row()
-            name_item = self.file_list.item(row, 0)
-            if name_item is None:
-                return
-            
-            name = name_item.text()
+            name = self.file_model.name_at(index.row())
             if not name:
                 return
             
@@ -438,7 +581,7 @@ class FilePanel(QWidget):
                 except Exception:
                     pass
             self.path_input.setText(self.current_path)
-            self.refresh()
+            self.refresh(use_cache=True)
             
             # 通知主窗口更新标签标题
             if self.on_path_changed_callback:
@@ -481,9 +624,8 @@ class FilePanel(QWidget):
     def get_selected_items(self):
         """获取选中的文件"""
         selected = []
-        for index in self.file_list.selectedIndexes():
-            row = index.row()
-            name = self.file_list.item(row, 0).text()
+        for row in self._selected_rows():
+            name = self.file_model.name_at(row)
             if name != '..':
                 selected.append((name, os.path.join(self.current_path, name)))
         return selected
@@ -491,35 +633,36 @@ class FilePanel(QWidget):
     def get_selected_files(self):
         """获取选中文件的完整路径列表"""
         files = []
-        for index in self.file_list.selectedIndexes():
-            row = index.row()
-            name = self.file_list.item(row, 0).text()
-            if name != '..' and os.path.isfile(os.path.join(self.current_path, name)):
+        for row in self._selected_rows():
+            name = self.file_model.name_at(row)
+            if name != '..' and not self.file_model.is_dir_at(row):
                 files.append(os.path.join(self.current_path, name))
         return files
     
-    def _match_filter(self, name):
-        """根据当前过滤规则匹配名称"""
-        if name == '..' or not self.filter_pattern:
-            return True
-        pattern = self.filter_pattern
-        if self.filter_mode == 'regex':
-            try:
-                return re.search(pattern, name, re.IGNORECASE) is not None
-            except re.error:
-                return True  # 正则错误时不阻断显示
-        return fnmatch.fnmatch(name.lower(), pattern.lower())
+    def _build_filter(self):
+        """按当前过滤规则编译过滤条件"""
+        if not self.filter_pattern:
+            return None
+        try:
+            return get_matcher(self.filter_pattern, self.filter_mode)
+        except re.error:
+            return None  # 正则错误时不阻断显示
     
     def apply_filter(self):
-        """应用过滤"""
-        self.filter_pattern = self.filter_input.text().strip()
-        self.refresh()
+        """应用过滤（在已加载的列表上过滤，不重新读取目录）"""
+        pattern = self.filter_input.text().strip()
+        if pattern == self.filter_pattern:
+            return
+        self.filter_pattern = pattern
+        self.file_model.set_filter(self._build_filter())
+        self.update_status()
     
     def clear_filter(self):
         """清除过滤"""
         self.filter_pattern = ""
         self.filter_input.clear()
-        self.refresh()
+        self.file_model.set_filter(None)
+        self.update_status()
     
     def on_tree_clicked(self, index):
         """目录树点击"""
@@ -536,7 +679,8 @@ class FilePanel(QWidget):
         """设置过滤模式"""
         if mode in ("wildcard", "regex"):
             self.filter_mode = mode
-            self.refresh()
+            self.file_model.set_filter(self._build_filter())
+            self.update_status()
     
     def copy_to(self, dest_path):
         """复制文件到目标路径"""
@@ -698,12 +698,12 @@ class MainWindow(QMainWindow):
                 border-radius: 3px;
                 padding: 2px;
             }
-            QTableWidget {
+            QTableView {
                 background-color: #F5FAFB;
                 border: 1px solid #ADD8E6;
                 border-radius: 3px;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #0078d4;
             }
         """
@@ -719,7 +719,7 @@ class MainWindow(QMainWindow):
                 border-radius: 3px;
                 padding: 2px;
             }
-            QTableWidget {
+            QTableView {
                 background-color: #FFFFFF;
                 border: 1px solid #D0D0D0;
                 border-radius: 3px;
@@ -3,7 +3,6 @@
 """
 
 import os
-import re
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, 
     QPushButton, QTableWidget, QTableWidgetItem, QMessageBox,
@@ -11,6 +10,7 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
+from services.pattern_matcher import get_matcher
 
 
 class RenameDialog(QDialog):
@@ -274,10 +274,8 @@ class RenameDialog(QDialog):
             if case_sensitive:
                 new_name = old_name.replace(find_text, replace_text)
             else:
-                # 不区分大小写替换
-                import re
-                pattern = re.compile(re.escape(find_text), re.IGNORECASE)
-                new_name = pattern.sub(replace_text, old_name)
+                # 不区分大小写替换（匹配器按查找文本缓存，预览时只编译一次）
+                new_name = get_matcher(find_text, 'literal').sub(replace_text, old_name)
         
         elif mode == 2:  # 插入模式
             insert_text = self.insert_text.text()
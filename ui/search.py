@@ -3,9 +3,15 @@
 """
 
 import os
-import re
+import sqlite3
+import stat
 from pathlib import Path
 
+from services.dir_walker import walk_parallel
+from services.file_index import get_file_index
+from services.pattern_matcher import get_matcher
+from services.search_query import SearchQuery
+
 
 class FileSearcher:
     """文件搜索器"""
@@ -13,28 +19,125 @@ class FileSearcher:
     def __init__(self, root_path):
         self.root_path = root_path
     
-    def search_by_name(self, pattern, include_dirs=True):
-        """按名称搜索文件"""
+    def search_by_name(self, pattern, include_dirs=True, use_index=False):
+        """按名称搜索文件
+
+        总是搜索整个子目录树；include_dirs 只决定结果中是否包含
+        名称匹配的文件夹，遍历方式与文件名索引一致。
+        默认逐个目录遍历，结果反映磁盘的当前状态。use_index 为 True 时
+        从文件名索引中查询：首次搜索某个目录时先同步建立持久化索引，
+        之后只在后台增量刷新，索引之后新建的文件可能暂时搜不到；
+        索引不可用时仍逐个目录遍历。
+        """
+        matcher = get_matcher(pattern)
+        if use_index:
+            results = self._search_index(matcher, include_dirs)
+            if results is not None:
+                return results
+
         results = []
         try:
             for root, dirs, files in os.walk(self.root_path):
-                if not include_dirs:
-                    dirs.clear()
-                
                 # 搜索目录
-                for dir_name in dirs:
-                    if self._match_pattern(pattern, dir_name):
+                if include_dirs:
+                    for dir_name in matcher.filter(dirs, use_extensions=False):
                         results.append(os.path.join(root, dir_name))
                 
                 # 搜索文件
-                for file_name in files:
-                    if self._match_pattern(pattern, file_name):
-                        results.append(os.path.join(root, file_name))
+                for file_name in matcher.filter(files):
+                    results.append(os.path.join(root, file_name))
         except PermissionError:
             pass
         
         return results
     
+    def _search_index(self, matcher, include_dirs):
+        """从文件名索引中按名称搜索，索引不可用时返回 None"""
+        index = get_file_index()
+        if index is None:
+            return None
+        try:
+            index.ensure(self.root_path)
+            matches = index.search(matcher, self.root_path, include_dirs)
+        except (OSError, sqlite3.Error):
+            return None
+        # 跳过索引之后已删除的条目
+        return [path for path, _, _, _ in matches if os.path.lexists(path)]
+    
+    def search(self, query, use_index=False):
+        """按组合条件搜索（如 "name:*.iso size:>1G modified:<30d"）
+
+        所有条件在一次遍历中检查：先按名称、扩展名和类型筛选，
+        只有通过的条目才取 stat 信息检查大小和修改时间。
+        从文件名索引中查询时，名称条件在索引中检查，候选条目再取当前的
+        stat 信息复核（索引之后已删除的条目被跳过）。
+
+        Args:
+            query: 查询文本或 SearchQuery
+            use_index: 是否使用文件名索引（见 search_by_name）
+
+        Returns:
+            list: 匹配的路径
+
+        Raises:
+            ValueError: 查询无法解析
+        """
+        if not isinstance(query, SearchQuery):
+            query = SearchQuery(query)
+        if use_index:
+            results = self._query_index(query)
+            if results is not None:
+                return results
+
+        results = []
+        for root, dirs, files in walk_parallel(self.root_path):
+            for is_dir, entries in ((True, dirs), (False, files)):
+                names = query.filter_names([entry.name for entry in entries], is_dir)
+                if not names:
+                    continue
+                if not query.needs_stat:
+                    results.extend(os.path.join(root, name) for name in names)
+                    continue
+                selected = set(names)
+                for entry in entries:
+                    if entry.name not in selected:
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    if query.matches_stat(0 if is_dir else st.st_size, st.st_mtime):
+                        results.append(entry.path)
+        return results
+    
+    def _query_index(self, query):
+        """从文件名索引中按组合条件搜索，索引不可用时返回 None"""
+        index = get_file_index()
+        if index is None:
+            return None
+        try:
+            index.ensure(self.root_path)
+            matches = index.search(query.matcher, self.root_path, query.include_dirs)
+            candidates = [
+                path for path, is_dir, size, mtime in matches
+                if query.matches_name(os.path.basename(path), is_dir)
+            ]
+        except (OSError, sqlite3.Error):
+            return None
+        if not query.needs_stat:
+            return [path for path in candidates if os.path.lexists(path)]
+        
+        # 索引中的大小和修改时间可能已过期，用当前的 stat 结果复核
+        results = []
+        for path in candidates:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if query.matches_stat(0 if stat.S_ISDIR(st.st_mode) else st.st_size, st.st_mtime):
+                results.append(path)
+        return results
+    
     def search_by_size(self, min_size=0, max_size=float('inf')):
         """按大小搜索文件"""
         results = []
@@ -57,21 +160,15 @@ class FileSearcher:
         """按扩展名搜索"""
         if isinstance(extensions, str):
             extensions = [extensions]
+        suffixes = tuple(extensions)
         
         results = []
         try:
             for root, dirs, files in os.walk(self.root_path):
                 for file_name in files:
-                    if any(file_name.endswith(ext) for ext in extensions):
+                    if file_name.endswith(suffixes):
                         results.append(os.path.join(root, file_name))
         except PermissionError:
             pass
         
         return results
-    
-    @staticmethod
-    def _match_pattern(pattern, text):
-        """匹配模式"""
-        # 支持通配符 * 和 ?
-        regex_pattern = pattern.replace('.', r'\.').replace('*', '.*').replace('?', '.')
-        return bool(re.match(f'^{regex_pattern}$', text, re.IGNORECASE))
@@ -4,73 +4,174 @@
 
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, 
-    QCheckBox, QPushButton, QTableWidget, QTableWidgetItem, QMessageBox,
+    QCheckBox, QPushButton, QTableView, QAbstractItemView, QMessageBox,
     QRadioButton, QButtonGroup
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtCore import QThread, QTimer, pyqtSignal
 import os
+import re
+import sqlite3
+import time
 from pathlib import Path
+from services.cancellation import CancellationToken, OperationCancelled
+from services.content_search import compile_content_pattern, search_content
+from services.dir_walker import walk_parallel
+from services.file_index import get_file_index
+from services.pattern_matcher import get_matcher
+from .search_result_model import SearchResultModel
 
 
 class SearchWorker(QThread):
-    """后台搜索线程"""
-    found_file = pyqtSignal(str)  # 信号
+    """后台搜索线程
+    
+    优先从文件名索引中查询：目录首次被搜索时在后台建立索引（本次遍历
+    目录），之后直接在内存中匹配，过期的索引在后台增量刷新。
+    索引不可用或未启用时并行遍历目录。
+    
+    指定 content 时为内容搜索：名称匹配的文件并行读取，每个匹配行一条结果。
+    
+    结果攒成批次再发出：第一批在 FIRST_BATCH_INTERVAL 内送出，之后每
+    BATCH_INTERVAL 或攒够 BATCH_SIZE 条时送出一批，几十万条结果也只
+    产生少量信号，不会挤占界面事件队列。
+    """
+    results_ready = pyqtSignal(list)  # [(路径, 行号, 行内容), ...]，按文件名搜索时后两项为 None
+    status = pyqtSignal(str)
     finished = pyqtSignal()
     
-    def __init__(self, root_path, pattern, use_regex=False, file_types=None):
+    MAX_HITS_PER_FILE = 1000
+    FIRST_BATCH_INTERVAL = 0.05  # 秒
+    BATCH_INTERVAL = 0.1  # 秒
+    BATCH_SIZE = 5000
+    INDEX_NOTE_AGE = 60  # 秒，索引比这更旧时在结果中注明
+    
+    def __init__(self, root_path, pattern, use_regex=False, file_types=None,
+                 include_dirs=False, use_index=True, content=None,
+                 content_regex=False, case_sensitive=False):
         super().__init__()
         self.root_path = root_path
         self.pattern = pattern
         self.use_regex = use_regex
         self.file_types = file_types or []
+        self.include_dirs = include_dirs
+        self.use_index = use_index
+        self.content = content
+        self.content_regex = content_regex
+        self.case_sensitive = case_sensitive
         self.stop_flag = False
+        self.cancel_token = CancellationToken()
+        self.result_note = ''
+        self._batch = []
+        self._deadline = 0
     
     def run(self):
         """执行搜索"""
         try:
-            for root, dirs, files in os.walk(self.root_path):
+            mode = 'regex' if self.use_regex else 'wildcard'
+            matcher = get_matcher(self.pattern, mode, self.file_types)
+            if self.content:
+                content_pattern = compile_content_pattern(
+                    self.content, self.content_regex, self.case_sensitive
+                )
+        except re.error:
+            self.finished.emit()  # 无效的正则表达式：没有结果
+            return
+        self._batch = []
+        self._deadline = time.monotonic() + self.FIRST_BATCH_INTERVAL
+        try:
+            if self.content:
+                self._search_content(matcher, content_pattern)
+            elif not (self.use_index and self._search_index(matcher)):
+                self._search_walk(matcher)
+        finally:
+            self._flush()
+            self.finished.emit()
+    
+    def _add_results(self, rows):
+        """加入结果，到达时间或数量上限时送出当前批次"""
+        self._batch.extend(rows)
+        if len(self._batch) >= self.BATCH_SIZE or time.monotonic() >= self._deadline:
+            self._flush()
+    
+    def _flush(self):
+        if self._batch and not self.stop_flag:
+            self.results_ready.emit(self._batch)
+        self._batch = []
+        self._deadline = time.monotonic() + self.BATCH_INTERVAL
+    
+    def _search_content(self, matcher, content_pattern):
+        """按内容搜索"""
+        self.status.emit("正在搜索文件内容...")
+        try:
+            for file_path, hits in search_content(
+                self.root_path, content_pattern, matcher,
+                max_hits=self.MAX_HITS_PER_FILE, cancel_token=self.cancel_token
+            ):
                 if self.stop_flag:
                     break
+                self._add_results([(file_path, line_no, text) for line_no, text in hits])
+        except OperationCancelled:
+            pass
+    
+    def _search_index(self, matcher):
+        """从文件名索引中搜索，索引不可用时返回 False
+        
+        目录尚未建立索引时在后台建立，本次返回 False 改为遍历目录。
+        索引中的结果逐个确认仍然存在后才显示；索引之后新建的文件
+        要等后台刷新完成才能搜到，result_note 中注明索引的时间。
+        """
+        index = get_file_index()
+        if index is None:
+            return False
+        try:
+            if not index.ensure(self.root_path, build=False):
+                self.result_note = "（文件名索引正在后台建立，下次搜索时使用）"
+                return False
+            age = index.age(self.root_path) or 0
+            matches = index.search(matcher, self.root_path, self.include_dirs)
+        except (OSError, sqlite3.Error, ValueError):
+            return False
+        
+        if age >= self.INDEX_NOTE_AGE:
+            self.result_note = f"（来自 {int(age // 60)} 分钟前的文件名索引，之后新建的文件可能未列出）"
+        for file_path, _, _, _ in matches:
+            if self.stop_flag:
+                break
+            if os.path.lexists(file_path):  # 跳过索引之后已删除的条目
+                self._add_results(((file_path, None, None),))
+        return True
+    
+    def _search_walk(self, matcher):
+        """并行遍历目录搜索"""
+        try:
+            for root, dirs, files in walk_parallel(self.root_path, cancel_token=self.cancel_token):
+                if self.stop_flag:
+                    break
+                
+                if self.include_dirs:
+                    names = matcher.filter([entry.name for entry in dirs], use_extensions=False)
+                    self._add_results([(os.path.join(root, name), None, None) for name in names])
                 
-                # 搜索文件
-                for file_name in files:
-                    if self.stop_flag:
-                        break
-                    
-                    if self._match_pattern(file_name):
-                        # 检查文件类型过滤
-                        if self.file_types:
-                            ext = os.path.splitext(file_name)[1].lower()
-                            if ext not in [t.lower() for t in self.file_types]:
-                                continue
-                        
-                        file_path = os.path.join(root, file_name)
-                        self.found_file.emit(file_path)
-        except PermissionError:
+                # 搜索文件（同时检查文件类型过滤）
+                names = matcher.filter([entry.name for entry in files])
+                self._add_results([(os.path.join(root, name), None, None) for name in names])
+        except OperationCancelled:
             pass
-        finally:
-            self.finished.emit()
     
     def stop(self):
         """停止搜索"""
         self.stop_flag = True
-    
-    def _match_pattern(self, text):
-        """匹配模式"""
-        import re
-        if self.use_regex:
-            try:
-                return bool(re.search(self.pattern, text, re.IGNORECASE))
-            except:
-                return False
-        else:
-            # 通配符模式
-            regex_pattern = self.pattern.replace('.', r'\.').replace('*', '.*').replace('?', '.')
-            return bool(re.match(f'^{regex_pattern}$', text, re.IGNORECASE))
+        self.cancel_token.cancel()
 
 
 class SearchDialog(QDialog):
-    """搜索对话框"""
+    """搜索对话框
+    
+    工作线程送来的结果先放入 pending_rows，由定时器按界面刷新节奏
+    （约 60 帧/秒）成批追加到结果模型，每帧最多追加 ROWS_PER_FLUSH 行。
+    """
+    
+    RESULT_FLUSH_INTERVAL_MS = 16
+    ROWS_PER_FLUSH = 20000
     
     def __init__(self, parent=None, root_path=None):
         super().__init__(parent)
@@ -78,6 +179,12 @@ class SearchDialog(QDialog):
         self.setWindowTitle("搜索文件")
         self.setGeometry(200, 200, 600, 400)
         self.search_worker = None
+        self.pending_rows = []
+        
+        self.result_flush_timer = QTimer(self)
+        self.result_flush_timer.setSingleShot(True)
+        self.result_flush_timer.setInterval(self.RESULT_FLUSH_INTERVAL_MS)
+        self.result_flush_timer.timeout.connect(self.flush_pending_rows)
         
         # 创建布局
         layout = QVBoxLayout()
@@ -93,6 +200,18 @@ class SearchDialog(QDialog):
         name_layout.addWidget(self.search_input)
         search_layout.addLayout(name_layout)
         
+        # 内容输入
+        content_layout = QHBoxLayout()
+        content_layout.addWidget(QLabel("包含文本:"))
+        self.content_input = QLineEdit()
+        self.content_input.setPlaceholderText("搜索文件内容（留空表示只按文件名搜索）")
+        content_layout.addWidget(self.content_input)
+        self.content_regex = QCheckBox("正则")
+        content_layout.addWidget(self.content_regex)
+        self.case_sensitive = QCheckBox("区分大小写")
+        content_layout.addWidget(self.case_sensitive)
+        search_layout.addLayout(content_layout)
+        
         # 搜索模式
         mode_layout = QHBoxLayout()
         self.wildcard_radio = QRadioButton("通配符 (*, ?)")
@@ -126,17 +245,28 @@ class SearchDialog(QDialog):
         # 选项
         options_layout = QHBoxLayout()
         self.include_dirs = QCheckBox("包含文件夹")
-        self.include_dirs.setChecked(True)
+        self.include_dirs.setChecked(False)
         options_layout.addWidget(self.include_dirs)
+        self.use_index = QCheckBox("使用文件名索引（更快，结果可能滞后几分钟）")
+        self.use_index.setChecked(True)
+        options_layout.addWidget(self.use_index)
         options_layout.addStretch()
         layout.addLayout(options_layout)
         
         # 结果表格
-        self.result_table = QTableWidget()
-        self.result_table.setColumnCount(2)
-        self.result_table.setHorizontalHeaderLabels(["文件名", "路径"])
+        self.result_model = SearchResultModel(self)
+        self.result_table = QTableView()
+        self.result_table.setModel(self.result_model)
+        self.result_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.result_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.result_table.verticalHeader().setDefaultSectionSize(
+            self.result_table.fontMetrics().height() + 6
+        )  # 固定行高，追加行时不逐行测量
         layout.addWidget(self.result_table)
         
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        
         # 底部按钮
         button_layout = QHBoxLayout()
         button_layout.addStretch()
@@ -156,6 +286,9 @@ class SearchDialog(QDialog):
     def start_search(self):
         """开始搜索"""
         pattern = self.search_input.text().strip()
+        content = self.content_input.text()
+        if not pattern and content:
+            pattern = '*'  # 只按内容搜索
         if not pattern:
             QMessageBox.warning(self, "警告", "请输入搜索条件")
             return
@@ -174,34 +307,55 @@ class SearchDialog(QDialog):
             self.search_worker.stop()
             self.search_worker.wait()
         
-        self.result_table.setRowCount(0)
-        self.search_worker = SearchWorker(self.root_path, pattern, use_regex, file_types)
-        self.search_worker.found_file.connect(self.add_result)
+        self.result_flush_timer.stop()
+        self.pending_rows = []
+        self.result_model.clear()
+        self.search_worker = SearchWorker(
+            self.root_path, pattern, use_regex, file_types,
+            self.include_dirs.isChecked(), self.use_index.isChecked(),
+            content or None, self.content_regex.isChecked(), self.case_sensitive.isChecked()
+        )
+        self.search_worker.results_ready.connect(self.add_results)
+        self.search_worker.status.connect(self.status_label.setText)
         self.search_worker.finished.connect(self.on_search_finished)
         self.search_worker.start()
     
-    def add_result(self, file_path):
-        """添加搜索结果"""
-        row = self.result_table.rowCount()
-        self.result_table.insertRow(row)
-        
-        file_name = os.path.basename(file_path)
-        name_item = QTableWidgetItem(file_name)
-        path_item = QTableWidgetItem(file_path)
-        
-        self.result_table.setItem(row, 0, name_item)
-        self.result_table.setItem(row, 1, path_item)
+    def add_results(self, rows):
+        """接收一批搜索结果"""
+        if self.sender() is not self.search_worker:
+            return  # 已被新搜索取代
+        self.pending_rows.extend(rows)
+        if not self.result_flush_timer.isActive():
+            self.result_flush_timer.start()
+    
+    def flush_pending_rows(self, limit=ROWS_PER_FLUSH):
+        """把积攒的结果成批追加到结果模型，余下的留到下一帧"""
+        self.result_flush_timer.stop()
+        if not self.pending_rows:
+            return
+        if limit is None or len(self.pending_rows) <= limit:
+            rows, self.pending_rows = self.pending_rows, []
+        else:
+            rows = self.pending_rows[:limit]
+            del self.pending_rows[:limit]
+            self.result_flush_timer.start()
+        self.result_model.append_rows(rows)
+        self.status_label.setText(f"已找到 {self.result_model.rowCount()} 个结果...")
     
     def on_search_finished(self):
         """搜索完成"""
-        count = self.result_table.rowCount()
+        if self.sender() is not self.search_worker:
+            return
+        self.flush_pending_rows(limit=None)
+        count = self.result_model.rowCount()
+        self.status_label.setText(f"找到 {count} 个结果{self.search_worker.result_note}")
         QMessageBox.information(self, "搜索完成", f"找到 {count} 个结果")
     
     def open_selected(self):
         """打开选中项"""
-        current_row = self.result_table.currentRow()
+        current_row = self.result_table.currentIndex().row()
         if current_row >= 0:
-            file_path = self.result_table.item(current_row, 1).text()
+            file_path = self.result_model.path_at(current_row)
             if os.path.exists(file_path):
                 os.startfile(file_path) if os.name == 'nt' else os.system(f'open "{file_path}"')
             else:
@@ -0,0 +1,73 @@
+"""
+搜索结果模型 - 基于 QAbstractTableModel 的只追加结果列表
+"""
+
+import os
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant
+
+
+class SearchResultModel(QAbstractTableModel):
+    """搜索结果模型
+
+    每行是一个元组 (路径, 行号, 行内容)，按文件名搜索时行号与内容为 None。
+    结果只追加不修改，append_rows 一次插入一整批，视图只绘制可见行，
+    几十万条结果也不会为每行创建控件。
+    """
+
+    COLUMNS = ["文件名", "路径", "行号", "内容"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+
+    # ---- Qt 模型接口 ----
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.COLUMNS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+        file_path, line_no, text = self._rows[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return os.path.basename(file_path)
+            if column == 1:
+                return file_path
+            if column == 2 and line_no is not None:
+                return str(line_no)
+            if column == 3 and text is not None:
+                return text.strip()
+        elif role == Qt.ToolTipRole and column == 1:
+            return file_path
+        return QVariant()
+
+    # ---- 数据装载 ----
+
+    def clear(self):
+        """清空结果"""
+        self.beginResetModel()
+        self._rows = []
+        self.endResetModel()
+
+    def append_rows(self, rows):
+        """在末尾追加一批结果（整批只通知视图一次）"""
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def path_at(self, row):
+        """取得指定行的文件路径"""
+        return self._rows[row][0]
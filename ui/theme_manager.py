@@ -68,13 +68,13 @@ class ThemeManager:
                     background-color: {theme['bg_color']};
                     color: {theme['fg_color']};
                 }}
-                QTableWidget {{
+                QTableView {{
                     background-color: {theme['bg_color']};
                     color: {theme['fg_color']};
                     border: 1px solid {theme['border_color']};
                     gridline-color: {theme['border_color']};
                 }}
-                QTableWidget::item:selected {{
+                QTableView::item:selected {{
                     background-color: {theme['selected_color']};
                 }}
                 QLineEdit {{